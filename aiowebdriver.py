@@ -0,0 +1,278 @@
+#
+# Asynchronous WebDriver client
+#
+# (c) 2018 Centraal Bureau voor de Statistiek / Statistics Netherlands
+#
+# A minimal client for the W3C WebDriver protocol, built on asyncio. It implements only the commands clockbot
+# uses, and sends them over a pool of keep-alive HTTP connections to the webdriver server (geckodriver,
+# chromedriver, or a Selenium server). Since waiting for a page load does not block a thread, one process can
+# drive many browser sessions at the same time
+#
+import asyncio
+import base64
+import json
+from time import perf_counter
+from urllib.parse import urlparse
+
+# Key under which the W3C WebDriver protocol identifies web elements
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+class WebDriverError(Exception):
+    """
+    Error returned by the webdriver server. error is the W3C error code, e.g. "no such element"
+    """
+    def __init__(self, error, message):
+        super().__init__(f"{error}: {message}")
+        self.error = error
+        self.message = message
+
+class StaleConnection(Exception):
+    """
+    A keep-alive connection was closed by the server before it sent any response
+    """
+    pass
+
+class HTTPConnectionPool:
+    """
+    Pool of keep-alive HTTP/1.1 connections to a single host. At most max_size requests are in progress at the
+    same time; idle connections are reused for the next request
+    """
+    def __init__(self, host, port, max_size = 100):
+        self.host = host
+        self.port = port
+        self.idle = []
+        self.semaphore = asyncio.Semaphore(max_size)
+
+    async def request(self, method, path, body = None):
+        """
+        Sends a request with an optional JSON body
+
+        Returns: tuple of the HTTP status and the response body (bytes)
+        """
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        async with self.semaphore:
+            while True:
+                reused = len(self.idle) > 0
+                if reused:
+                    reader, writer = self.idle.pop()
+                else:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+                try:
+                    status, headers, data = await self.round_trip(reader, writer, method, path, payload)
+                except StaleConnection:
+                    writer.close()
+                    if reused:
+                        # The server closed the idle connection; the request was not processed, so try again
+                        continue
+                    raise ConnectionError("connection closed by webdriver server")
+                except:
+                    writer.close()
+                    raise
+
+                if headers.get("connection", "").lower() == "close":
+                    writer.close()
+                else:
+                    self.idle.append((reader, writer))
+                return status, data
+
+    async def round_trip(self, reader, writer, method, path, payload):
+        head = (f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: keep-alive\r\n"
+                "\r\n")
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise StaleConnection()
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            data = b"".join(chunks)
+        else:
+            data = await reader.read()
+            headers["connection"] = "close"
+        return status, headers, data
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+class WebDriverClient:
+    """
+    Client for a webdriver server, e.g. WebDriverClient("http://127.0.0.1:4444"). All sessions created by one
+    client share its connection pool
+    """
+    def __init__(self, url = "http://127.0.0.1:4444", max_connections = 100):
+        parsed = urlparse(url)
+        self.pool = HTTPConnectionPool(parsed.hostname, parsed.port or 80, max_connections)
+        self.prefix = parsed.path.rstrip("/")
+
+    async def command(self, method, path, body = None):
+        """
+        Sends a webdriver command, and returns its value. Raises WebDriverError if the server returns an error
+        """
+        status, data = await self.pool.request(method, self.prefix + path, body)
+        value = json.loads(data.decode("utf-8"))["value"] if data else None
+        if status >= 400 or (isinstance(value, dict) and "error" in value):
+            value = value if isinstance(value, dict) else {}
+            raise WebDriverError(value.get("error", f"HTTP {status}"), value.get("message", ""))
+        return value
+
+    async def new_session(self, capabilities = {}, on_command = None):
+        """
+        Starts a browser session
+
+        capabilities: dict of W3C capabilities, e.g. from the to_capabilities() method of selenium's browser options
+        on_command: function called after every command of the session, with the command name and the start and
+            end time (perf_counter) of the command. Command names are those of selenium, e.g. "clickElement"
+
+        Returns: Session instance
+        """
+        start = perf_counter()
+        value = await self.command("POST", "/session", { "capabilities": { "alwaysMatch": capabilities } })
+        if on_command is not None:
+            on_command("newSession", start, perf_counter())
+        return Session(self, value["sessionId"], value.get("capabilities", {}), on_command)
+
+    def close(self):
+        self.pool.close()
+
+class Session:
+    """
+    A browser session. Provides the subset of the webdriver API that clockbot uses
+    """
+    def __init__(self, client, session_id, capabilities, on_command = None):
+        self.client = client
+        self.session_id = session_id
+        self.capabilities = capabilities
+        self.on_command = on_command
+
+    async def execute(self, name, method, path, body = None):
+        start = perf_counter()
+        try:
+            return await self.client.command(method, f"/session/{self.session_id}{path}", body)
+        finally:
+            if self.on_command is not None:
+                self.on_command(name, start, perf_counter())
+
+    def wrap(self, value):
+        """
+        Converts web element references in a command result to Element instances
+        """
+        if isinstance(value, list):
+            return [ self.wrap(item) for item in value ]
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return Element(self, value[ELEMENT_KEY])
+            return { key: self.wrap(item) for key, item in value.items() }
+        return value
+
+    def unwrap(self, value):
+        """
+        Converts Element instances in script arguments to web element references
+        """
+        if isinstance(value, Element):
+            return { ELEMENT_KEY: value.element_id }
+        if isinstance(value, (list, tuple)):
+            return [ self.unwrap(item) for item in value ]
+        if isinstance(value, dict):
+            return { key: self.unwrap(item) for key, item in value.items() }
+        return value
+
+    async def get(self, url):
+        await self.execute("get", "POST", "/url", { "url": url })
+
+    async def set_script_timeout(self, seconds):
+        await self.execute("setTimeouts", "POST", "/timeouts", { "script": int(1000 * seconds) })
+
+    async def maximize_window(self):
+        await self.execute("maximizeWindow", "POST", "/window/maximize", {})
+
+    async def set_window_rect(self, width, height):
+        await self.execute("setWindowRect", "POST", "/window/rect", { "width": width, "height": height })
+
+    async def find_element(self, css_selector):
+        return self.wrap(await self.execute("findElement", "POST", "/element", { "using": "css selector", "value": css_selector }))
+
+    async def find_elements(self, css_selector):
+        return self.wrap(await self.execute("findElements", "POST", "/elements", { "using": "css selector", "value": css_selector }))
+
+    async def execute_script(self, script, *args):
+        return self.wrap(await self.execute("w3cExecuteScript", "POST", "/execute/sync", { "script": script, "args": self.unwrap(args) }))
+
+    async def execute_async_script(self, script, *args):
+        return self.wrap(await self.execute("w3cExecuteScriptAsync", "POST", "/execute/async", { "script": script, "args": self.unwrap(args) }))
+
+    async def get_log(self, log_type):
+        """
+        Returns the entries of the given log (e.g. "performance") since the previous call. Not part of the W3C
+        protocol; supported by chromedriver and the Selenium server
+        """
+        return await self.execute("getLog", "POST", "/se/log", { "type": log_type })
+
+    async def execute_cdp_cmd(self, cmd, params = {}, vendor = "goog"):
+        """
+        Executes a Chrome DevTools Protocol command, in Chrome (vendor "goog") or Edge (vendor "ms")
+        """
+        return await self.execute("executeCdpCommand", "POST", f"/{vendor}/cdp/execute", { "cmd": cmd, "params": params })
+
+    async def delete_all_cookies(self):
+        await self.execute("deleteAllCookies", "DELETE", "/cookie")
+
+    async def screenshot(self):
+        """
+        Returns: a screenshot of the current page, as PNG data
+        """
+        return base64.b64decode(await self.execute("screenshot", "GET", "/screenshot"))
+
+    async def page_source(self):
+        return await self.execute("getPageSource", "GET", "/source")
+
+    async def delete(self):
+        """
+        Ends the session and closes the browser
+        """
+        await self.execute("quit", "DELETE", "")
+
+class Element:
+    """
+    A web element, found by Session.find_element(s) or returned by a script
+    """
+    def __init__(self, session, element_id):
+        self.session = session
+        self.element_id = element_id
+
+    async def text(self):
+        return await self.session.execute("getElementText", "GET", f"/element/{self.element_id}/text")
+
+    async def get_attribute(self, name):
+        return await self.session.execute("getElementAttribute", "GET", f"/element/{self.element_id}/attribute/{name}")
+
+    async def click(self):
+        await self.session.execute("clickElement", "POST", f"/element/{self.element_id}/click", {})
+
+    async def send_keys(self, text):
+        await self.session.execute("sendKeysToElement", "POST", f"/element/{self.element_id}/value", { "text": text })
@@ -1,41 +1,160 @@
 import csv
 import sys
 import os
+import argparse
+import json
+import math
+import sqlite3
+from time import time, sleep
+
+import numpy as np
 
 csv.register_dialect("nl_excel", csv.excel, delimiter = ";")
 
 class ClockbotLogMiner:
 
-    def __init__(self, filename):
-        self.f_in = open(filename, "r", encoding = "utf-8")
-        
-        out_filename = os.path.splitext(in_filename)[0] + "_timedata.csv"
-        self.f_out = open(out_filename, "w", newline = "", encoding = "utf-8")
-        self.csv_out = csv.writer(self.f_out, dialect = "nl_excel")
-        self.csv_out.writerow(["browser", "methode", "run_nr", "gebruikersnaam", "laadtijd", "item"])
+    # Columns of the _timedata.csv file, one row per navigation
+    timedata_columns = ["browser", "methode", "run_nr", "gebruikersnaam", "laadtijd", "item", "laadtijd_pagina", "sessie",
+                        "configuratie", "wd_commandos", "wd_tijd", "overhead", "gelijktijdig", "campagne", "verzoeken", "bytes",
+                        "ttfb", "script_tijd", "render_tijd", "van_item", "cache", "gecensureerd", "netwerkprofiel"]
+
+    # State of a single browser session. With the async backend of clockbot, the events of concurrent sessions are
+    # interleaved in one log; every event then carries the session number, and each session has its own state
+    session_attributes = {
+        "browser": None,
+        "username": None,
+        "start_time": None,
+        "end_time": None,
+        "page_time": None,
+        "commands": None,
+        "network": None,
+        "item": None,
+        "target": None,
+        "run_nr": None,
+        "cache": None,
+        "warm_up": False,
+        "buffer": [],
+        "silent": False
+    }
+
+    def __init__(self, out_filename, subtract_overhead = False):
+        # Subclasses that store the rows elsewhere pass None as out_filename
+        if out_filename is not None:
+            self.f_out = open(out_filename, "w", newline = "", encoding = "utf-8")
+            self.csv_out = csv.writer(self.f_out, dialect = "nl_excel")
+            self.csv_out.writerow(self.timedata_columns)
 
+        self.subtract_overhead = subtract_overhead
         self.runs = {}
         self.buffer = []
 
         self.silent = False
         self.browser = None
         self.traversal_method = None
+        self.session_mode = None
+        self.config = None
+        self.campaign = ""
+        self.network_profile = ""
         self.username = None
         self.start_time = None
         self.end_time = None
+        self.page_time = None
+        self.commands = None
+        self.network = None
         self.item = None
+        self.target = None
+        self.menu_items = {}
+        self.run_nr = None
+        self.cache = None
+        self.warm_up = False
+        self.finished = False
+        self.record = {}
+        self.session = None
+        self.sessions = {}
+        self.load_step = None
+        self.load_step_start = None
+        self.load_step_durations = {}
 
-    def process_all(self):
-        for line in self.f_in.readlines():
-            timestamp = float(line[24:41])
-            message = line[42:].strip()
-            
-            for action_line, handler in self.action_lines:
-                is_match = message[:len(action_line)] == action_line
-                suffix = message[len(action_line):]
-                if is_match:
-                    handler(self, timestamp, suffix)
-                    break
+    def process_file(self, filename, follow = False):
+        # Logs written before session reuse was introduced always start a fresh browser for each run
+        self.session_mode = "fresh"
+        self.config = ""
+        self.campaign = ""
+        self.network_profile = ""
+        self.finished = False
+        with open(filename, "r", encoding = "utf-8") as f_in:
+            if follow:
+                self.process_all(self.follow_lines(f_in))
+            else:
+                self.process_all(f_in)
+
+    def follow_lines(self, f_in, interval = 1.0):
+        """
+        Yields the lines of a log file that is still being written, like tail -f. Incomplete lines are held back
+        until they are complete. Stops when clockbot has logged "End"
+        """
+        partial = ""
+        while not self.finished:
+            line = f_in.readline()
+            if not line:
+                sleep(interval)
+                continue
+            partial += line
+            if partial.endswith("\n"):
+                yield partial
+                partial = ""
+
+    def process_all(self, lines):
+        for line in lines:
+            self.process_line(line)
+
+    def process_line(self, line):
+        # Log lines are either JSON objects (log format "jsonl"), or human-readable date and time, followed by
+        # the time stamp and the message (log format "text"). In the jsonl format, durations are computed from
+        # the monotonic time stamp, which is not affected by changes of the system clock
+        if line.startswith("{"):
+            try:
+                self.record = json.loads(line)
+            except ValueError:
+                # The last line of a campaign that was interrupted may have been cut off
+                return
+            timestamp = self.record["mono"]
+            message = self.record["event"].strip()
+            self.switch_session(self.record.get("session"))
+        else:
+            self.record = {}
+            try:
+                date, clock, timestamp, message = line.split(" ", 3)
+                timestamp = float(timestamp)
+            except ValueError:
+                # The last line of a campaign that was interrupted may have been cut off
+                return
+            message = message.strip()
+
+        # Messages either consist of a fixed prefix, followed by ": " and a value, or of a fixed text,
+        # possibly followed by a number. Both kinds of prefix are looked up in the actions dict
+        prefix, separator, suffix = message.partition(": ")
+        handler = self.actions.get(prefix) if separator else None
+        if handler is None:
+            prefix = message.rstrip("0123456789. ")
+            suffix = message[len(prefix):]
+            handler = self.actions.get(prefix)
+        if handler is not None:
+            handler(self, timestamp, suffix)
+
+    def switch_session(self, session):
+        """
+        Makes the state of the given session the current state
+        """
+        if session == self.session:
+            return
+        self.sessions[self.session] = { name: getattr(self, name) for name in self.session_attributes }
+        state = self.sessions.pop(session, None)
+        if state is None:
+            state = { name: (list(value) if isinstance(value, list) else value) for name, value in self.session_attributes.items() }
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.session = session
 
     def set_browser_name(self, t, browser_name):
         self.browser = browser_name
@@ -43,59 +162,859 @@ class ClockbotLogMiner:
     def set_traversal_method(self, t, traversal_method):
         self.traversal_method = traversal_method
 
+    def set_config(self, t, config):
+        self.config = config
+
+    def set_session_mode(self, t, session_mode):
+        self.session_mode = session_mode
+
     def set_username(self, t, username):
         self.username = username
+        self.item = None
         if self.username not in self.runs:
             self.runs[self.username] = 1
 
+    def fields(self, s):
+        """
+        Returns the structured data of the current log event: the fields of the record in the jsonl log
+        format, or the JSON appended to the message in the text log format
+        """
+        return self.record if self.record else json.loads(s)
+
     def set_start_time(self, timestamp, s):
         self.start_time = timestamp
+        self.page_time = None
+        self.commands = None
+        self.network = None
+        self.target = None
+
+    def set_target(self, timestamp, s):
+        # Navigating to the menu item with the given number; the first menu item has number 0
+        self.set_start_time(timestamp, s)
+        self.target = int(s) if s.strip() else 0
 
     def set_end_time(self, timestamp, s):
         self.end_time = timestamp
 
+    def set_timeout(self, timestamp, s):
+        # The menu item that was being navigated to, if any, is logged with the timeout
+        self.end_time = timestamp
+        _, _, fields = s.partition(": ")
+        self.target = (self.record or json.loads(fields or "{}")).get("target", self.target)
+
+    def set_page_time(self, t, s):
+        self.page_time = float(s.split()[0]) / 1000
+
+    def set_commands(self, t, s):
+        self.commands = self.fields(s)
+
+    def set_network(self, t, s):
+        self.network = self.fields(s)
+
     def set_item(self, t, item):
+        # Each navigation goes from the previous active item to the new one; the first, logging in, from nowhere
+        from_item = self.item
         self.item = item
+        if self.target is not None:
+            self.menu_items[(self.config, self.target)] = item
+        self.add_row(item, from_item, False)
+
+    def set_censored(self, t, s):
+        # A step that exceeded its deadline ends the run. Its load time, up to the timeout, is a lower bound of the
+        # real load time: a censored sample. The page that was being loaded is the target menu item, if the page
+        # of that menu item has been seen before with the same configuration; otherwise it is unknown
+        from_item = self.item
+        self.item = None
+        self.add_row(self.menu_items.get((self.config, self.target), ""), from_item, True)
+
+    def add_row(self, item, from_item, censored):
+        """
+        Adds the navigation that has just ended to the rows of the current run
+        """
+        # The harness overhead is the time between the start of the step and the click: the webdriver
+        # commands and Python code before the click delay it, while those after the click overlap with
+        # loading the page
+        overhead = None
+        if self.commands is not None and self.commands.get("before_click_ms") is not None:
+            overhead = self.commands["before_click_ms"] / 1000
+        load_time = self.end_time - self.start_time
+        if self.subtract_overhead and overhead is not None:
+            load_time -= overhead
+
         self.buffer.append([
             self.browser, 
             self.traversal_method, 
-            self.runs[self.username], 
+            self.runs[self.username] if self.run_nr is None else self.run_nr, 
             self.username, 
-            "{:.3f}".format(self.end_time - self.start_time).replace(".", ","), 
-            self.item
-        ])
+            "{:.3f}".format(load_time).replace(".", ","), 
+            item,
+            "" if self.page_time is None else "{:.3f}".format(self.page_time).replace(".", ","),
+            self.session_mode,
+            self.config,
+            "" if self.commands is None else self.commands["count"],
+            "" if self.commands is None else "{:.3f}".format(self.commands["time_ms"] / 1000).replace(".", ","),
+            "" if overhead is None else "{:.3f}".format(overhead).replace(".", ","),
+            self.load_step or "",
+            self.campaign
+        ] + self.network_columns() + [ from_item or "", self.cache or "", 1 if censored else 0, self.network_profile ])
+
+    def network_columns(self):
+        """
+        Returns the columns with the network breakdown of the current step: number of requests, bytes, longest
+        time to first byte, script time and render time. Empty if clockbot did not log the network breakdown
+        """
+        if self.network is None:
+            return [ "" ] * 5
+        return [ self.network["requests"], self.network["bytes"] ] + [
+            "" if self.network[field] is None else "{:.3f}".format(self.network[field] / 1000).replace(".", ",")
+            for field in ["ttfb_ms", "script_ms", "render_ms"] ]
+
+    def set_run_number(self, t, s):
+        # Logs written since campaigns can be resumed number the runs explicitly, so that the run numbers stay
+        # the same when runs are skipped. A run that was interrupted before it completed is discarded
+        self.run_nr = int(s)
+        self.buffer = []
+        self.silent = False
+        self.warm_up = False
+
+    def set_clockbot_start(self, t, s):
+        # A resumed campaign appends to the log of the interrupted one; discard the runs that were in progress.
+        # The network profile is only logged when one is emulated
+        self.network_profile = ""
+        self.buffer = []
+        self.silent = False
+        self.run_nr = None
+        self.warm_up = False
+        self.sessions = {}
 
     def set_silent(self, t, s):
         self.silent = True
 
+    def set_warm_up(self, t, s):
+        # Unlike "Not on first page", which only discards the part of the run before the browser is restarted or
+        # reset, a warm-up run is discarded as a whole
+        self.warm_up = True
+
+    def set_cache(self, t, cache):
+        self.cache = cache
+
     def write_data(self, t, s):
-        if not self.silent:
-            for output in self.buffer:
-                self.csv_out.writerow(output)
+        # A run ends with "Closing browser" when a fresh browser is used for each run, and with "Run complete"
+        # when the browser is reused. When the browser is reused, "Resetting session" discards a run that did
+        # not start on the first page. An empty buffer means that the run has already been written
+        if not self.silent and not self.warm_up and self.buffer:
+            self.write_rows(self.buffer)
             self.runs[self.username] += 1
         self.buffer = []
         self.silent = False
 
-    action_lines = [
-        ("Starting browser: ", set_browser_name),
-        ("Traversal method: ", set_traversal_method),
-        ("Filling in username: ", set_username),
-        ("Pressing login button", set_start_time),
-        ("Navigating to first menu item", set_start_time),
-        ("Navigating to next menu item", set_start_time),
-        ("Navigating to menu item", set_start_time),
-        ("Active item: ", set_item),
-        ("Not on first page", set_silent),
-        ("Closing browser", write_data),
-        ("Login complete", set_end_time),
-        ("Navigation complete", set_end_time)
-    ]
+    def write_rows(self, rows):
+        self.csv_out.writerows(rows)
+        self.f_out.flush()
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Missing argument: input filename")
+    def set_campaign(self, t, campaign):
+        self.campaign = campaign
+
+    def set_network_profile(self, t, network_profile):
+        self.network_profile = network_profile
+
+    def set_load_step(self, t, s):
+        self.load_step = s
+        self.load_step_start = t
+
+    def set_load_step_complete(self, t, s):
+        self.load_step_durations[self.load_step] = t - self.load_step_start
+        self.load_step = None
+
+    def set_finished(self, t, s):
+        self.finished = True
+
+    actions = {
+        "Clockbot start": set_clockbot_start,
+        "Run number": set_run_number,
+        "Starting browser": set_browser_name,
+        "Traversal method": set_traversal_method,
+        "Filling in username": set_username,
+        "Pressing login button": set_start_time,
+        "Navigating to first menu item": set_target,
+        "Navigating to next menu item": set_start_time,
+        "Navigating to menu item": set_target,
+        "Active item": set_item,
+        "Not on first page": set_silent,
+        "Warm-up run": set_warm_up,
+        "Cache state": set_cache,
+        "Configuration": set_config,
+        "Campaign": set_campaign,
+        "Network profile": set_network_profile,
+        "Session mode": set_session_mode,
+        "Closing browser": write_data,
+        "Run complete": write_data,
+        "Resetting session": write_data,
+        "Login complete": set_end_time,
+        "Navigation complete": set_end_time,
+        "Step timeout": set_timeout,
+        "Recycling browser session": set_censored,
+        "In-page load time": set_page_time,
+        "WebDriver commands": set_commands,
+        "Network breakdown": set_network,
+        "Load step": set_load_step,
+        "Load step complete": set_load_step_complete,
+        "End": set_finished
+    }
+
+# Columns of the results database that hold numbers; the others hold text. The columns are those of the
+# _timedata.csv file, and are indexed on the columns that queries select by
+results_numeric_columns = {
+    "run_nr": "INTEGER",
+    "laadtijd": "REAL",
+    "laadtijd_pagina": "REAL",
+    "wd_commandos": "INTEGER",
+    "wd_tijd": "REAL",
+    "overhead": "REAL",
+    "gelijktijdig": "INTEGER",
+    "verzoeken": "INTEGER",
+    "bytes": "INTEGER",
+    "ttfb": "REAL",
+    "script_tijd": "REAL",
+    "render_tijd": "REAL",
+    "gecensureerd": "INTEGER"
+}
+results_indexed_columns = ["campagne", "configuratie", "browser", "methode", "gebruikersnaam", "item", "netwerkprofiel"]
+
+def open_results_db(filename):
+    """
+    Opens the results database, and creates its tables and indexes if they do not exist yet. The table logs has a
+    row for every log file that was ingested, with the offset up to which it was read and the state of the log
+    miner at that point; the table navigations has the rows of the _timedata.csv file of every log
+
+    Returns: sqlite3 connection
+    """
+    db = sqlite3.connect(filename)
+    columns = ", ".join(f"{column} {results_numeric_columns.get(column, 'TEXT')}" for column in ClockbotLogMiner.timedata_columns)
+    db.execute("CREATE TABLE IF NOT EXISTS logs (id INTEGER PRIMARY KEY, filename TEXT UNIQUE, head TEXT, offset INTEGER, state TEXT, ingested REAL)")
+    db.execute(f"CREATE TABLE IF NOT EXISTS navigations (log_id INTEGER REFERENCES logs(id), {columns})")
+    # Databases created by an earlier version of the analyzer lack the columns that were added since
+    existing = { row[1] for row in db.execute("PRAGMA table_info(navigations)") }
+    for column in ClockbotLogMiner.timedata_columns:
+        if column not in existing:
+            db.execute(f"ALTER TABLE navigations ADD COLUMN {column} {results_numeric_columns.get(column, 'TEXT')}")
+    db.execute("CREATE INDEX IF NOT EXISTS navigations_log_id ON navigations (log_id)")
+    for column in results_indexed_columns:
+        db.execute(f"CREATE INDEX IF NOT EXISTS navigations_{column} ON navigations ({column})")
+    db.commit()
+    return db
+
+class ClockbotLogIngester(ClockbotLogMiner):
+    """
+    Log miner that stores the load times in the results database instead of a _timedata.csv file. Log files are
+    ingested incrementally: only the lines added since the previous ingest are read. A log file that was
+    overwritten, i.e. that no longer starts with the same line, is ingested again from the start
+    """
+
+    # Attributes of the log miner that are saved with the offset up to which a log was read, so that reading
+    # can continue from there with the browser, configuration, runs in progress etc. of the log
+    checkpoint_attributes = ["runs", "browser", "traversal_method", "session_mode", "config", "campaign", "network_profile", "username",
+                             "start_time", "end_time", "page_time", "commands", "network", "item", "target", "run_nr", "cache", "warm_up", "buffer", "silent",
+                             "session", "load_step", "load_step_start", "finished"]
+
+    def __init__(self, db, subtract_overhead = False):
+        super().__init__(None, subtract_overhead)
+        self.db = db
+        self.log_id = None
+        self.n_rows = 0
+        # Logs written before session reuse was introduced always start a fresh browser for each run
+        self.session_mode = "fresh"
+        self.config = ""
+        self.initial_state = self.checkpoint()
+
+    def checkpoint(self):
+        state = { name: getattr(self, name) for name in self.checkpoint_attributes }
+        # JSON objects only have string keys, session numbers are integers, and menu items are keyed by configuration
+        # and menu item number
+        state["sessions"] = list(self.sessions.items())
+        state["menu_items"] = [ [ config, target, item ] for (config, target), item in self.menu_items.items() ]
+        return json.dumps(state)
+
+    def restore(self, checkpoint):
+        state = json.loads(checkpoint)
+        self.sessions = { session: session_state for session, session_state in state.pop("sessions") }
+        self.menu_items = { (config, target): item for config, target, item in state.pop("menu_items", []) }
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def write_rows(self, rows):
+        values = []
+        for row in rows:
+            values.append([ self.log_id ] + [
+                (None if value == "" else float(str(value).replace(",", ".")) if column in results_numeric_columns else value)
+                for column, value in zip(self.timedata_columns, row) ])
+        placeholders = ", ".join("?" * (len(self.timedata_columns) + 1))
+        self.db.executemany(f"INSERT INTO navigations (log_id, {', '.join(self.timedata_columns)}) VALUES ({placeholders})", values)
+        self.n_rows += len(rows)
+
+    def ingest_file(self, filename, campaign = ""):
+        """
+        Adds the navigations in the part of the log file that has not been ingested before to the database. The
+        rows and the new offset are committed together, so that an interrupted ingest can simply be repeated.
+        An incomplete last line, of a log that clockbot is still writing, is left for the next ingest
+
+        campaign (string): campaign of the navigations, for logs that do not name their campaign
+
+        Returns: the number of navigations added
+        """
+        path = os.path.abspath(filename)
+        self.n_rows = 0
+        with open(path, "rb") as f_in:
+            head = f_in.readline().decode("utf-8")
+            f_in.seek(0, os.SEEK_END)
+            size = f_in.tell()
+
+            known = self.db.execute("SELECT id, head, offset, state FROM logs WHERE filename = ?", (path,)).fetchone()
+            if known is not None and (known[1] != head or known[2] > size):
+                self.db.execute("DELETE FROM navigations WHERE log_id = ?", (known[0],))
+                self.db.execute("DELETE FROM logs WHERE id = ?", (known[0],))
+                known = None
+            if known is None:
+                self.log_id = self.db.execute("INSERT INTO logs (filename, head, offset) VALUES (?, ?, 0)", (path, head)).lastrowid
+                offset = 0
+                self.restore(self.initial_state)
+                self.campaign = campaign
+            else:
+                self.log_id, _, offset, state = known
+                self.restore(state)
+
+            f_in.seek(offset)
+            for line in f_in:
+                if not line.endswith(b"\n"):
+                    break
+                self.process_line(line.decode("utf-8"))
+                offset += len(line)
+
+        self.db.execute("UPDATE logs SET offset = ?, state = ?, ingested = ? WHERE id = ?", (offset, self.checkpoint(), time(), self.log_id))
+        self.db.commit()
+        return self.n_rows
+
+# Columns of the _timedata.csv file by which the summary statistics are grouped, and the percentiles that are reported
+summary_group_columns = ["browser", "methode", "configuratie", "netwerkprofiel", "cache", "item"]
+summary_percentiles = [50, 90, 95, 99]
+
+def nl_number(x, digits = 3):
+    """
+    Formats a number with a comma as decimal separator, as in the rest of the output of the analyzer. NaN,
+    e.g. the standard deviation of a single measurement, becomes an empty field
+    """
+    if np.isnan(x):
+        return ""
+    return "{:.{}f}".format(x, digits).replace(".", ",")
+
+def read_timedata(filenames, measure = "laadtijd"):
+    """
+    Reads one or more _timedata.csv files written by ClockbotLogMiner, and returns the given measure, and all
+    columns, as numpy arrays. Rows without a value for the measure (e.g., no in-page load time) are skipped
+
+    filenames: list of names of _timedata.csv files
+    measure (string): name of the column with the load times, e.g. "laadtijd" or "laadtijd_pagina"
+
+    Returns: tuple of an array with the measure, and a dict of column name to array of strings
+    """
+    columns = {}
+    values = []
+    for filename in filenames:
+        with open(filename, "r", newline = "", encoding = "utf-8") as f_in:
+            for row in csv.DictReader(f_in, dialect = "nl_excel"):
+                value = row.get(measure, "")
+                if not value:
+                    continue
+                values.append(float(value.replace(",", ".")))
+                for column in row:
+                    columns.setdefault(column, []).append(row[column] or "")
+
+    n = len(values)
+    columns = { column: np.array(column_values, dtype = str) for column, column_values in columns.items() if len(column_values) == n }
+    return np.array(values, dtype = float), columns
+
+def split_censored(values, columns):
+    """
+    Separates the censored load times, of steps that exceeded their deadline, from the others. A censored load
+    time is the time up to the timeout, so it is left out of all statistics
+
+    Returns: tuple of the values and columns of the uncensored rows, and the columns of the censored rows
+    """
+    censored = columns.get("gecensureerd", np.full(len(values), "")) == "1"
+    return (values[~censored], { column: column_values[~censored] for column, column_values in columns.items() },
+            { column: column_values[censored] for column, column_values in columns.items() })
+
+def group_rows(columns, group_columns):
+    """
+    Determines the groups of rows with equal values in the given columns
+
+    Returns: tuple of an array with the unique combinations of values (one row per group), and an array with
+    the group number of each row
+    """
+    keys = np.stack([ columns.get(column, np.full(len(next(iter(columns.values()))), "")) for column in group_columns ], axis = 1)
+    groups, group_ids = np.unique(keys, axis = 0, return_inverse = True)
+    return groups, group_ids.reshape(-1)
+
+def sorted_quantiles(sorted_values, starts, counts, q):
+    """
+    Computes quantiles of all groups at once. The values must be sorted by group, and within each group by value,
+    so that the values of group g are sorted_values[starts[g]:starts[g] + counts[g]]. The quantiles are
+    interpolated linearly, as by numpy.percentile. Works on the last axis, so that sorted_values may also hold a
+    batch of bootstrap samples, one per row
+
+    q: array of quantiles, between 0 and 1
+
+    Returns: array of shape (..., len(q), number of groups)
+    """
+    q = np.asarray(q, dtype = float).reshape(-1, 1)
+    pos = starts + q * (counts - 1)
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, starts + counts - 1)
+    frac = pos - lo
+    v_lo = sorted_values[..., lo]
+    v_hi = sorted_values[..., hi]
+    return v_lo + frac * (v_hi - v_lo)
+
+def bootstrap_intervals(sorted_values, group_ids, starts, counts, n_bootstrap, rng, alpha = 0.05, chunk_size = 10_000_000):
+    """
+    Computes bootstrap confidence intervals for the mean and the median of all groups at once. Every bootstrap
+    sample resamples each group with replacement; a batch of bootstrap samples is one 2-dimensional array, with
+    one sample per row. To find the medians of all groups in a single sort, each group is shifted by a multiple
+    of the range of the data, so that the groups stay separate when a sample is sorted
+
+    sorted_values, group_ids: values sorted by group and value, and their group numbers
+    starts, counts: start index and size of each group in sorted_values
+    n_bootstrap (integer): number of bootstrap samples
+    rng: numpy random generator
+
+    Returns: tuple of arrays (mean_low, mean_high, median_low, median_high), with one value per group
+    """
+    n = len(sorted_values)
+    shift = group_ids * (sorted_values.max() - sorted_values.min() + 1.0)
+    batch = max(1, min(n_bootstrap, chunk_size // max(n, 1)))
+    means = []
+    medians = []
+    for done in range(0, n_bootstrap, batch):
+        size = min(batch, n_bootstrap - done)
+        picks = starts[group_ids] + np.floor(rng.random((size, n)) * counts[group_ids]).astype(int)
+        samples = sorted_values[picks]
+        means.append(np.add.reduceat(samples, starts, axis = 1) / counts)
+        samples = np.sort(samples + shift, axis = 1) - shift
+        medians.append(sorted_quantiles(samples, starts, counts, [0.5])[:, 0, :])
+    means = np.concatenate(means)
+    medians = np.concatenate(medians)
+    q = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+    mean_low, mean_high = np.percentile(means, q, axis = 0)
+    median_low, median_high = np.percentile(medians, q, axis = 0)
+    return mean_low, mean_high, median_low, median_high
+
+def summarize(values, columns, group_columns = summary_group_columns, n_bootstrap = 1000, n_bins = 50, seed = 0):
+    """
+    Computes summary statistics and latency histograms of the load times per group. All statistics are computed
+    for all groups at once, with array operations over all measurements. Censored load times, of steps that
+    exceeded their deadline, are left out of the statistics; their number is reported last. Groups with only
+    censored load times are reported after the others
+
+    values: array of load times
+    columns: dict of column name to array, as returned by read_timedata
+    group_columns: list of names of the columns by which the measurements are grouped
+    n_bootstrap (integer): number of bootstrap samples for the confidence intervals, or 0 to skip them
+    n_bins (integer): number of histogram bins, of equal width, from 0 to the largest load time
+
+    Returns: tuple of a list of summary rows and a list of histogram rows, both starting with the group values
+    """
+    n_statistics = 2 + len(summary_percentiles) + 4
+    values, columns, censored_columns = split_censored(values, columns)
+    censored = {}
+    if len(next(iter(censored_columns.values()))) > 0:
+        censored_groups, censored_ids = group_rows(censored_columns, group_columns)
+        censored = { tuple(group): int(count) for group, count in zip(censored_groups, np.bincount(censored_ids)) }
+
+    if len(values) == 0:
+        return [ list(group) + [ 0 ] + [ nl_number(math.nan) ] * n_statistics + [ count ] for group, count in sorted(censored.items()) ], []
+
+    groups, group_ids = group_rows(columns, group_columns)
+    order = np.lexsort((values, group_ids))
+    sorted_values = values[order]
+    sorted_ids = group_ids[order]
+    counts = np.bincount(group_ids, minlength = len(groups))
+    starts = np.cumsum(counts) - counts
+
+    means = np.bincount(group_ids, weights = values, minlength = len(groups)) / counts
+    deviations = np.bincount(group_ids, weights = (values - means[group_ids]) ** 2, minlength = len(groups))
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        stddevs = np.sqrt(deviations / (counts - 1))
+    percentiles = sorted_quantiles(sorted_values, starts, counts, np.array(summary_percentiles) / 100)
+    if n_bootstrap > 0:
+        mean_low, mean_high, median_low, median_high = bootstrap_intervals(
+            sorted_values, sorted_ids, starts, counts, n_bootstrap, np.random.default_rng(seed))
+    else:
+        mean_low = mean_high = median_low = median_high = np.full(len(groups), np.nan)
+
+    summary = []
+    for g, group in enumerate(groups):
+        summary.append(list(group) + [ counts[g] ] + [ nl_number(x) for x in [
+            means[g], stddevs[g], *percentiles[:, g], mean_low[g], mean_high[g], median_low[g], median_high[g] ] ] + [ censored.pop(tuple(group), 0) ])
+    for group, count in sorted(censored.items()):
+        summary.append(list(group) + [ 0 ] + [ nl_number(math.nan) ] * n_statistics + [ count ])
+
+    edges = np.linspace(0, values.max(), n_bins + 1)
+    bins = np.clip(np.searchsorted(edges, values, side = "right") - 1, 0, n_bins - 1)
+    histograms = np.bincount(group_ids * n_bins + bins, minlength = len(groups) * n_bins).reshape(len(groups), n_bins)
+
+    histogram = []
+    for g, group in enumerate(groups):
+        for b in range(n_bins):
+            histogram.append(list(group) + [ nl_number(edges[b]), nl_number(edges[b + 1]), histograms[g, b] ])
+
+    return summary, histogram
+
+def summary_header(group_columns):
+    return group_columns + ["aantal", "gemiddelde", "stdafw"] + [ f"p{p}" for p in summary_percentiles ] + [
+        "gemiddelde_bi_laag", "gemiddelde_bi_hoog", "p50_bi_laag", "p50_bi_hoog", "gecensureerd" ]
+
+def write_csv(filename, header, rows):
+    with open(filename, "w", newline = "", encoding = "utf-8") as f_out:
+        csv_out = csv.writer(f_out, dialect = "nl_excel")
+        csv_out.writerow(header)
+        csv_out.writerows(rows)
+
+def summary_main(argv):
+    """
+    analyzer.py summary: summary statistics and histograms of the load times in one or more _timedata.csv files
+    """
+    parser = argparse.ArgumentParser(prog = "analyzer.py summary", description = "Compute summary statistics and latency histograms per page from _timedata.csv files")
+    parser.add_argument(dest = "in_filenames", nargs = "+", help = "_timedata.csv file(s) written by the analyzer")
+    parser.add_argument("-m", dest = "measure", default = "laadtijd", help = "Column with the load times. Default: %(default)s.")
+    parser.add_argument("-g", dest = "group_columns", default = ",".join(summary_group_columns), help = "Comma-separated columns to group by. Default: %(default)s.")
+    parser.add_argument("-B", dest = "n_bootstrap", type = int, default = 1000, help = "Number of bootstrap samples for the 95%% confidence intervals. Default: %(default)i.")
+    parser.add_argument("--bins", dest = "n_bins", type = int, default = 50, help = "Number of histogram bins. Default: %(default)i.")
+    parser.add_argument("--seed", dest = "seed", type = int, default = 0, help = "Seed of the random generator for the bootstrap. Default: %(default)i.")
+    parser.add_argument("-o", dest = "out_prefix", default = None, help = "Prefix of the output files <prefix>_summary.csv and <prefix>_histogram.csv. Default: name of the first input file.")
+    args = parser.parse_args(argv)
+
+    if args.out_prefix is None:
+        args.out_prefix = os.path.splitext(args.in_filenames[0])[0]
+    group_columns = args.group_columns.split(",")
+
+    values, columns = read_timedata(args.in_filenames, args.measure)
+    if len(values) == 0:
+        print("No measurements found")
+        exit(1)
+
+    summary, histogram = summarize(values, columns, group_columns, args.n_bootstrap, args.n_bins, args.seed)
+    write_csv(args.out_prefix + "_summary.csv", summary_header(group_columns), summary)
+    write_csv(args.out_prefix + "_histogram.csv", group_columns + ["bin_laag", "bin_hoog", "aantal"], histogram)
+
+def rank_data(x):
+    """
+    Returns the ranks of the values in x, starting at 1. Tied values get the average of their ranks
+    """
+    _, inverse, counts = np.unique(x, return_inverse = True, return_counts = True)
+    ends = np.cumsum(counts)
+    return (ends - (counts - 1) / 2)[inverse.reshape(-1)]
+
+def mann_whitney_greater(a, b):
+    """
+    One-sided Mann-Whitney U test of whether the values in b tend to be larger than those in a, using the normal
+    approximation with tie and continuity correction
+
+    Returns: the p-value
+    """
+    na, nb = len(a), len(b)
+    n = na + nb
+    ranks = rank_data(np.concatenate([a, b]))
+    u = ranks[na:].sum() - nb * (nb + 1) / 2
+    _, ties = np.unique(np.concatenate([a, b]), return_counts = True)
+    variance = na * nb / 12 * ((n + 1) - (ties ** 3 - ties).sum() / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - na * nb / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def bootstrap_median_difference(a, b, n_bootstrap, rng, alpha = 0.05):
+    """
+    Bootstrap distribution of the difference of the medians of b and a
+
+    Returns: tuple of the lower and upper bound of the confidence interval of the difference, and the
+    one-sided bootstrap p-value of the difference being 0 or less
+    """
+    medians_a = np.median(a[rng.integers(0, len(a), (n_bootstrap, len(a)))], axis = 1)
+    medians_b = np.median(b[rng.integers(0, len(b), (n_bootstrap, len(b)))], axis = 1)
+    differences = medians_b - medians_a
+    low, high = np.percentile(differences, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+    return low, high, (differences <= 0).mean()
+
+def compare(values_a, columns_a, values_b, columns_b, group_columns = ["item"], n_bootstrap = 1000, alpha = 0.05,
+            threshold = 0.0, relative_threshold = 0.0, seed = 0):
+    """
+    Compares the load times of two result sets, e.g. of two Blaise versions, page by page. The pages of both sets
+    are aligned by the values of the group columns. A page has regressed if the load times in b are significantly
+    larger than in a (by a one-sided Mann-Whitney test at level alpha), and the median increased by more than
+    threshold seconds and by more than relative_threshold percent. Censored load times are left out
+
+    Returns: list of rows, ranked by the increase of the median, and the number of regressed pages
+    """
+    values_a, columns_a, _ = split_censored(values_a, columns_a)
+    values_b, columns_b, _ = split_censored(values_b, columns_b)
+    rng = np.random.default_rng(seed)
+    groups_a, ids_a = group_rows(columns_a, group_columns)
+    groups_b, ids_b = group_rows(columns_b, group_columns)
+    index_b = { tuple(group): g for g, group in enumerate(groups_b) }
+
+    rows = []
+    for g, group in enumerate(groups_a):
+        if tuple(group) not in index_b:
+            continue
+        a = values_a[ids_a == g]
+        b = values_b[ids_b == index_b[tuple(group)]]
+        median_a, median_b = np.median(a), np.median(b)
+        difference = median_b - median_a
+        relative = 100 * difference / median_a if median_a > 0 else math.nan
+        p_mw = mann_whitney_greater(a, b)
+        low, high, p_bootstrap = bootstrap_median_difference(a, b, n_bootstrap, rng, alpha)
+        regressed = p_mw < alpha and difference > threshold and (math.isnan(relative) or relative > relative_threshold)
+        rows.append((difference, list(group) + [ len(a), len(b) ] + [ nl_number(x) for x in [
+            median_a, median_b, difference, relative, low, high ] ] + [ nl_number(p_mw, 4), nl_number(p_bootstrap, 4), "ja" if regressed else "nee" ]))
+
+    rows.sort(key = lambda row: row[0], reverse = True)
+    n_regressed = sum(row[1][-1] == "ja" for row in rows)
+    return [ row for _, row in rows ], n_regressed
+
+def compare_main(argv):
+    """
+    analyzer.py compare A B: per-page comparison of the load times of two result sets. Exits with code 1 if any
+    page has regressed, so that the comparison can be used in scripts
+    """
+    parser = argparse.ArgumentParser(prog = "analyzer.py compare", description = "Compare the load times per page of two result sets, e.g. of two Blaise versions, and flag pages that became slower")
+    parser.add_argument(dest = "filename_a", help = "_timedata.csv file of the baseline, e.g. the old version")
+    parser.add_argument(dest = "filename_b", help = "_timedata.csv file to compare with the baseline, e.g. the new version")
+    parser.add_argument("-m", dest = "measure", default = "laadtijd", help = "Column with the load times. Default: %(default)s.")
+    parser.add_argument("-g", dest = "group_columns", default = "item", help = "Comma-separated columns by which pages are aligned. Default: %(default)s.")
+    parser.add_argument("-t", dest = "threshold", type = float, default = 0.1, help = "Minimum increase of the median load time, in seconds, for a page to count as regressed. Default: %(default)s.")
+    parser.add_argument("-r", dest = "relative_threshold", type = float, default = 10.0, help = "Minimum relative increase of the median load time, in percent, for a page to count as regressed. Default: %(default)s.")
+    parser.add_argument("-a", dest = "alpha", type = float, default = 0.05, help = "Significance level. Default: %(default)s.")
+    parser.add_argument("-B", dest = "n_bootstrap", type = int, default = 1000, help = "Number of bootstrap samples. Default: %(default)i.")
+    parser.add_argument("--seed", dest = "seed", type = int, default = 0, help = "Seed of the random generator for the bootstrap. Default: %(default)i.")
+    parser.add_argument("-o", dest = "out_filename", default = None, help = "Filename of output file. Default: print to the console.")
+    args = parser.parse_args(argv)
+
+    group_columns = args.group_columns.split(",")
+    values_a, columns_a = read_timedata([args.filename_a], args.measure)
+    values_b, columns_b = read_timedata([args.filename_b], args.measure)
+    if len(values_a) == 0 or len(values_b) == 0:
+        print("No measurements found")
         exit(1)
-    in_filename = sys.argv[1]
 
-    clm = ClockbotLogMiner(in_filename)
-    clm.process_all()
+    rows, n_regressed = compare(values_a, columns_a, values_b, columns_b, group_columns, args.n_bootstrap, args.alpha,
+                                args.threshold, args.relative_threshold, args.seed)
+    header = group_columns + ["aantal_a", "aantal_b", "p50_a", "p50_b", "verschil", "verschil_pct",
+                              "verschil_bi_laag", "verschil_bi_hoog", "p_mann_whitney", "p_bootstrap", "regressie"]
+    if args.out_filename is None:
+        csv_out = csv.writer(sys.stdout, dialect = "nl_excel")
+        csv_out.writerow(header)
+        csv_out.writerows(rows)
+    else:
+        write_csv(args.out_filename, header, rows)
+
+    if n_regressed > 0:
+        print(f"{n_regressed} page(s) regressed", file = sys.stderr)
+        exit(1)
+
+def load_main(argv):
+    """
+    analyzer.py load: report of a load test (clockbot --load). Extracts the load times from the log, like the default
+    command, and reports the throughput and the latency percentiles for every number of concurrent respondents, both
+    over all pages and per page
+    """
+    parser = argparse.ArgumentParser(prog = "analyzer.py load", description = "Report throughput and latency per step of a clockbot load test")
+    parser.add_argument(dest = "in_filenames", nargs = "+", help = "Clockbot log file(s) of the load test")
+    parser.add_argument("-o", dest = "out_prefix", default = None, help = "Prefix of the output files <prefix>_timedata.csv, <prefix>_load.csv and <prefix>_load_pages.csv. Default: name of the first log file.")
+    args = parser.parse_args(argv)
+
+    if args.out_prefix is None:
+        args.out_prefix = os.path.splitext(args.in_filenames[0])[0]
+
+    clm = ClockbotLogMiner(args.out_prefix + "_timedata.csv")
+    for in_filename in args.in_filenames:
+        clm.process_file(in_filename)
+    clm.f_out.close()
+
+    values, columns = read_timedata([args.out_prefix + "_timedata.csv"])
+    in_load_step = columns.get("gelijktijdig", np.array([], dtype = str)) != ""
+    values = values[in_load_step]
+    columns = { column: column_values[in_load_step] for column, column_values in columns.items() }
+    if len(values) == 0:
+        print("No load test measurements found")
+        exit(1)
+
+    # Rows of the summary: group values, count, mean, stddev, percentiles, confidence intervals
+    n_percentiles = len(summary_percentiles)
+    steps, _ = summarize(values, columns, ["gelijktijdig"], n_bootstrap = 0)
+    rows = []
+    for row in sorted(steps, key = lambda row: int(row[0])):
+        step, count = row[0], row[1]
+        duration = clm.load_step_durations.get(step, math.nan)
+        rows.append([ step, nl_number(duration), count, nl_number(count / duration) ] + row[4:4 + n_percentiles])
+    write_csv(args.out_prefix + "_load.csv",
+              ["gelijktijdig", "duur_s", "navigaties", "doorvoer_per_s"] + [ f"p{p}" for p in summary_percentiles ], rows)
+
+    pages, _ = summarize(values, columns, ["gelijktijdig", "item"], n_bootstrap = 0)
+    pages.sort(key = lambda row: (int(row[0]), row[1]))
+    write_csv(args.out_prefix + "_load_pages.csv", ["gelijktijdig", "item", "aantal"] + [ f"p{p}" for p in summary_percentiles ],
+              [ row[:3] + row[5:5 + n_percentiles] for row in pages ])
+
+def baseline_main(argv):
+    """
+    analyzer.py baseline: baseline of the load times per configuration and page, for the anomaly detector of clockbot
+    (clockbot --baseline). The baseline of a page is the median and the scaled median absolute deviation of the
+    logarithm of its load times, which are not thrown off by a few outliers in the campaigns it is taken from
+    """
+    parser = argparse.ArgumentParser(prog = "analyzer.py baseline", description = "Write the baseline of the load times per configuration and page, for clockbot --baseline")
+    parser.add_argument(dest = "in_filenames", nargs = "+", help = "_timedata.csv file(s) of earlier campaigns")
+    parser.add_argument("-m", dest = "measure", default = "laadtijd", help = "Column with the load times. Default: %(default)s.")
+    parser.add_argument("--min-samples", dest = "min_samples", type = int, default = 10, help = "Minimum number of load times of a page for a baseline. Default: %(default)i.")
+    parser.add_argument("-o", dest = "out_filename", default = "baseline.json", help = "Baseline file. Default: %(default)s.")
+    args = parser.parse_args(argv)
+
+    values, columns = read_timedata(args.in_filenames, args.measure)
+    values, columns, _ = split_censored(values, columns)
+    if len(values) == 0:
+        print("No measurements found")
+        exit(1)
+
+    group_columns = ["configuratie", "item"]
+    groups, group_ids = group_rows(columns, group_columns)
+    logs = np.log(np.maximum(values, 0.001))
+    order = np.lexsort((logs, group_ids))
+    counts = np.bincount(group_ids, minlength = len(groups))
+    starts = np.cumsum(counts) - counts
+    medians = sorted_quantiles(logs[order], starts, counts, [0.5])[0]
+
+    # The median absolute deviation, from the deviations sorted within each group in the same way
+    deviations = np.abs(logs - medians[group_ids])
+    order = np.lexsort((deviations, group_ids))
+    mads = sorted_quantiles(deviations[order], starts, counts, [0.5])[0]
+
+    pages = [ { "configuratie": group[0], "item": group[1], "n": int(counts[g]), "mean_log": float(medians[g]), "sd_log": float(1.4826 * mads[g]) }
+              for g, group in enumerate(groups) if counts[g] >= args.min_samples ]
+    with open(args.out_filename, "w", encoding = "utf-8") as f_out:
+        json.dump({ "measure": args.measure, "pages": pages }, f_out, ensure_ascii = False, indent = 1)
+    print(f"Baseline of {len(pages)} page(s) written to {args.out_filename}")
+
+def ingest_main(argv):
+    """
+    analyzer.py ingest: add the page load times in clockbot log files to the results database
+    """
+    parser = argparse.ArgumentParser(prog = "analyzer.py ingest", description = "Add the page load times in clockbot log files to a results database. Only the parts of the logs that were not ingested before are read.")
+    parser.add_argument(dest = "db_filename", help = "Results database (SQLite). Created if it does not exist.")
+    parser.add_argument(dest = "in_filenames", nargs = "+", help = "Clockbot log file(s)")
+    parser.add_argument("--campaign", dest = "campaign", default = "", help = "Campaign of logs that do not name their campaign (clockbot --campaign).")
+    parser.add_argument("-s", "--subtract-overhead", dest = "subtract_overhead", action = "store_true", help = "Subtract the harness overhead before the click from the load times.")
+    args = parser.parse_args(argv)
+
+    db = open_results_db(args.db_filename)
+    ingester = ClockbotLogIngester(db, args.subtract_overhead)
+    for in_filename in args.in_filenames:
+        n_rows = ingester.ingest_file(in_filename, args.campaign)
+        print(f"{in_filename}: {n_rows} navigations added")
+    db.close()
+
+def query_main(argv):
+    """
+    analyzer.py query: summary statistics of the load times in the results database, selected by campaign,
+    configuration, browser, traversal method, user name, item and network profile
+    """
+    parser = argparse.ArgumentParser(prog = "analyzer.py query", description = "Compute summary statistics per page of the navigations in a results database")
+    parser.add_argument(dest = "db_filename", help = "Results database written by analyzer.py ingest")
+    parser.add_argument("--campaign", dest = "campagne", help = "Comma-separated campaign(s) to select.")
+    parser.add_argument("-c", dest = "configuratie", help = "Comma-separated configuration(s) to select.")
+    parser.add_argument("-b", dest = "browser", help = "Comma-separated browser(s) to select.")
+    parser.add_argument("-t", dest = "methode", help = "Comma-separated traversal method(s) to select.")
+    parser.add_argument("-u", dest = "gebruikersnaam", help = "Comma-separated user name(s) to select.")
+    parser.add_argument("-i", dest = "item", help = "Comma-separated item(s) to select.")
+    parser.add_argument("-n", dest = "netwerkprofiel", help = "Comma-separated network profile(s) to select.")
+    parser.add_argument("-m", dest = "measure", default = "laadtijd", choices = [ column for column, kind in results_numeric_columns.items() if kind == "REAL" ], help = "Column with the load times. Default: %(default)s.")
+    parser.add_argument("-g", dest = "group_columns", default = ",".join(["campagne"] + summary_group_columns), help = "Comma-separated columns to group by. Default: %(default)s.")
+    parser.add_argument("-B", dest = "n_bootstrap", type = int, default = 0, help = "Number of bootstrap samples for the 95%% confidence intervals. Default: %(default)i (no intervals).")
+    parser.add_argument("--bins", dest = "n_bins", type = int, default = 50, help = "Number of histogram bins. Default: %(default)i.")
+    parser.add_argument("--seed", dest = "seed", type = int, default = 0, help = "Seed of the random generator for the bootstrap. Default: %(default)i.")
+    parser.add_argument("--export", dest = "export_filename", default = None, help = "Also write the selected navigations to this _timedata.csv file, e.g. for analyzer.py compare.")
+    parser.add_argument("-o", dest = "out_prefix", default = None, help = "Prefix of the output files <prefix>_summary.csv and <prefix>_histogram.csv. Default: name of the database, with _query appended.")
+    args = parser.parse_args(argv)
+
+    if args.out_prefix is None:
+        args.out_prefix = os.path.splitext(args.db_filename)[0] + "_query"
+    group_columns = args.group_columns.split(",")
+    unknown = set(group_columns) - set(ClockbotLogMiner.timedata_columns)
+    if unknown:
+        parser.error("unknown column(s): " + ", ".join(sorted(unknown)))
+
+    conditions = [ f"{args.measure} IS NOT NULL" ]
+    parameters = []
+    for column in results_indexed_columns:
+        selected = getattr(args, column)
+        if selected is not None:
+            selected = selected.split(",")
+            conditions.append(f"{column} IN ({', '.join('?' * len(selected))})")
+            parameters += selected
+    where = " AND ".join(conditions)
+
+    db = open_results_db(args.db_filename)
+    if args.export_filename is not None:
+        cursor = db.execute(f"SELECT {', '.join(ClockbotLogMiner.timedata_columns)} FROM navigations WHERE {where}", parameters)
+        write_csv(args.export_filename, ClockbotLogMiner.timedata_columns,
+                  ( [ "" if value is None else nl_number(value) if isinstance(value, float) else value for value in row ] for row in cursor ))
+
+    rows = db.execute(f"SELECT {args.measure}, gecensureerd, {', '.join(group_columns)} FROM navigations WHERE {where}", parameters).fetchall()
+    db.close()
+    if len(rows) == 0:
+        print("No measurements found")
+        exit(1)
+
+    values = np.array([ row[0] for row in rows ], dtype = float)
+    columns = { column: np.array([ "" if row[i + 1] is None else str(row[i + 1]) for row in rows ], dtype = str)
+                for i, column in enumerate(["gecensureerd"] + group_columns) }
+    summary, histogram = summarize(values, columns, group_columns, args.n_bootstrap, args.n_bins, args.seed)
+    write_csv(args.out_prefix + "_summary.csv", summary_header(group_columns), summary)
+    write_csv(args.out_prefix + "_histogram.csv", group_columns + ["bin_laag", "bin_hoog", "aantal"], histogram)
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description = "Extract page load times from one or more clockbot log files")
+    parser.add_argument(dest = "in_filenames", nargs = "+", help = "Clockbot log file(s), e.g. the log files of all workers of one run")
+    parser.add_argument("-f", "--follow", dest = "follow", action = "store_true", help = "Follow a log file that clockbot is still writing, and write each run as soon as it is complete. Stops when clockbot ends.")
+    parser.add_argument("-s", "--subtract-overhead", dest = "subtract_overhead", action = "store_true", help = "Subtract the harness overhead before the click from the load times.")
+    parser.add_argument("-o", dest = "out_filename", default = None, help = "Filename of output file. Default: name of the first log file, with _timedata.csv appended.")
+    args = parser.parse_args(argv)
+
+    if args.out_filename is None:
+        args.out_filename = os.path.splitext(args.in_filenames[0])[0] + "_timedata.csv"
+    if args.follow and len(args.in_filenames) > 1:
+        parser.error("--follow requires a single log file")
+
+    return args
+
+def mine_main(argv):
+    """
+    analyzer.py <log files>: extract the page load times from clockbot log files into a _timedata.csv file
+    """
+    args = parse_arguments(argv)
+
+    clm = ClockbotLogMiner(args.out_filename, args.subtract_overhead)
+    for in_filename in args.in_filenames:
+        clm.process_file(in_filename, args.follow)
+
+commands = {
+    "summary": summary_main,
+    "compare": compare_main,
+    "load": load_main,
+    "baseline": baseline_main,
+    "ingest": ingest_main,
+    "query": query_main
+}
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in commands:
+        commands[sys.argv[1]](sys.argv[2:])
+    else:
+        mine_main(sys.argv[1:])
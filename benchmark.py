@@ -0,0 +1,97 @@
+#
+# Clockbot benchmark
+#
+# (c) 2018 Centraal Bureau voor de Statistiek / Statistics Netherlands
+#
+# This program measures clockbot itself. It starts the local test server (testserver.py), runs every page-load
+# detection strategy, in both wait modes, with every traversal method against it, and compares the load times
+# clockbot measures with the delays the server was configured with. The difference is the measurement bias of
+# clockbot; the number of navigations per second is the throughput of the harness.
+#
+# Arguments that the benchmark does not know are passed on to clockbot, e.g. -b chrome
+#
+import argparse
+import re
+from time import time
+
+import numpy as np
+
+import clockbot
+import analyzer
+import testserver
+
+# Page-load detection strategies, i.e. the click_and_wait functions that configuration files can choose
+strategies = {
+    "contents": clockbot.click_and_wait_contents,
+    "ie": clockbot.click_and_wait_ie,
+    "splash": clockbot.click_and_wait_splash
+}
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description = "Measure the bias and throughput of clockbot against the local test server")
+    parser.add_argument("-n", dest = "n_runs", type = int, default = 3, help = "Number of runs for each combination. Default: %(default)i.")
+    parser.add_argument("-o", dest = "out_prefix", default = "benchmark", help = "Prefix of the log files and the results file. Default: %(default)s.")
+    parser.add_argument("-p", dest = "port", type = int, default = 0, help = "Port of the test server. Default: any free port.")
+    testserver.add_server_arguments(parser)
+    return parser.parse_known_args()
+
+def run_combination(clockbot_args, strategy, log_filename, out_filename):
+    """
+    Runs clockbot with the given arguments and page-load detection strategy, and extracts the load times from its log
+
+    Returns: the wall clock time of all runs, in seconds
+    """
+    clockbot.log_init(log_filename, clockbot_args.log_format, clockbot_args.fsync_policy)
+    clockbot.click_and_wait = strategies[strategy]
+    clockbot.log("Clockbot start")
+    clockbot.log("Strategy: " + strategy)
+    clockbot.log_settings(clockbot_args)
+    start = time()
+    clockbot.run_all(clockbot_args, [ { "Gebruikersnaam": "benchmark", "Wachtwoord": "benchmark" } ])
+    elapsed = time() - start
+    clockbot.log("End")
+    clockbot.log_close()
+
+    clm = analyzer.ClockbotLogMiner(out_filename)
+    clm.process_file(log_filename)
+    clm.f_out.close()
+    return elapsed
+
+def bias(out_filename, server):
+    """
+    Returns the differences between the load times measured by clockbot, and the delays of the server. Note that
+    the load time after logging in also includes loading the questionnaire page itself. Steps that exceeded their
+    deadline have no load time to compare, and are left out
+    """
+    values, columns = analyzer.read_timedata([out_filename])
+    values, columns, _ = analyzer.split_censored(values, columns)
+    expected = [ server.page_delay(int(re.search(r"\d+", item).group()) - 1) for item in columns["item"] ]
+    return values - np.array(expected)
+
+if __name__ == "__main__":
+    args, clockbot_argv = parse_arguments()
+
+    server = testserver.start_server(args.port, **testserver.server_settings(args))
+    port = server.server_address[1]
+
+    results = []
+    for strategy in strategies:
+        for wait_mode in clockbot.wait_modes:
+            for method in clockbot.methods:
+                clockbot_args = clockbot.parse_arguments([ "-", "-c", "local", "-n", str(args.n_runs), "-t", method,
+                                                          "-w", wait_mode, "--log-format", "jsonl" ] + clockbot_argv)
+                clockbot.load_config(clockbot_args.config)
+                clockbot.base_url = f"http://127.0.0.1:{port}/"
+
+                name = f"{args.out_prefix}_{strategy}_{wait_mode}_{method}"
+                elapsed = run_combination(clockbot_args, strategy, name + ".log", name + "_timedata.csv")
+                differences = bias(name + "_timedata.csv", server)
+                p50, p95 = np.percentile(differences, [50, 95]) if len(differences) else (np.nan, np.nan)
+                results.append([ strategy, wait_mode, method, len(differences) ] + [ analyzer.nl_number(x) for x in [
+                    np.mean(differences) if len(differences) else np.nan, p50, p95, len(differences) / elapsed ] ])
+                print(";".join(str(x) for x in results[-1]))
+
+    server.shutdown()
+    analyzer.write_csv(args.out_prefix + "_results.csv",
+                       ["strategie", "wachtmodus", "methode", "aantal", "bias_gemiddelde", "bias_p50", "bias_p95", "navigaties_per_s"],
+                       results)
@@ -16,12 +16,26 @@ import sys
 import os
 import math
 import argparse
-from time import time, localtime, sleep, strftime
+import multiprocessing
+import threading
+import queue
+from time import time, monotonic, perf_counter, localtime, sleep, strftime
 from importlib import import_module
 import json
+import asyncio
+import bisect
+import re
+import shutil
+from collections import deque
 
 from selenium import webdriver
 from selenium.common.exceptions import *
+from selenium.webdriver.remote.command import Command
+
+import aiowebdriver
+import analyzer
+import metrics
+import throttleproxy
 
 # Force csv to write file in Dutch csv format (i.e., use ; as field delimiters).
 # But note that the Python csv standard library does not support commas as decimal separators.
@@ -39,21 +53,260 @@ browsers = {
     "edge": webdriver.Edge
 }
 
+# Load test profile: the numbers of concurrent simulated respondents, in increasing steps, and the duration of each
+# step in seconds. Configuration files can override these
+load_steps = [ 1, 5, 10, 25, 50 ]
+load_step_duration = 300
+
+# Page load strategies: whether driver.get() waits for the complete page with all resources ("normal"), only for the
+# DOM to be ready ("eager"), or does not wait at all ("none")
+page_load_strategies = [
+    "normal",
+    "eager",
+    "none"
+]
+
+# File name patterns of web fonts, for blocking fonts in Chromium-based browsers
+font_url_patterns = [ "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot" ]
+
+# Vendor prefixes of the Chromium-based browsers, for their capabilities (e.g. goog:loggingPrefs) and their
+# commands for the Chrome DevTools Protocol. Only these browsers can log the network requests of each step
+chromium_vendor_prefixes = {
+    "chrome": "goog",
+    "edge": "ms"
+}
+
+# Chrome DevTools Protocol performance metrics (cumulative durations in seconds) that make up the script time and the
+# render time of a navigation step
+script_metrics = [ "ScriptDuration" ]
+render_metrics = [ "LayoutDuration", "RecalcStyleDuration" ]
+
 # List of traversal methods. "Linear" starts with the first page and repeatedly pushes the "Next page"
 # button until the last page is reached. "Index" traverses all pages that can be reached from the menu bar
-# by clicking each menu item in turn and returning to the first page afterwards
+# by clicking each menu item in turn and returning to the first page afterwards. "Graph" also clicks each menu
+# item in turn, but goes straight from one menu item to the next, so it needs half the navigations of "index"
 methods = [
     "linear",
-    "index"
+    "index",
+    "graph"
+]
+
+# Browser session modes. "Fresh" starts a new browser, with a fresh profile, for every run, so every run measures
+# a cold start. "Reuse" keeps one browser per worker, and resets it between runs by clearing cookies and storage
+session_modes = [
+    "fresh",
+    "reuse"
+]
+
+# Cache modes. "Cold" starts every browser with a fresh, empty profile. "Warm" starts every browser with a persisted
+# profile, one per browser (and per worker or session), which keeps its cache between runs and between campaigns
+cache_modes = [
+    "cold",
+    "warm"
+]
+
+# Webdriver backends. "Selenium" uses the blocking selenium client, with one browser per worker process. "Async"
+# uses the asyncio client in aiowebdriver.py, with which a single process drives many browsers at the same time
+backends = [
+    "selenium",
+    "async"
+]
+
+# Ways of detecting page loads. "Poll" repeatedly queries the page through the webdriver until the page has
+# changed. "Event" installs a MutationObserver in the page, and waits for it in a single asynchronous script call
+wait_modes = [
+    "poll",
+    "event"
+]
+
+# JavaScript that installs a MutationObserver which watches for the end of a page load. It stores its state in
+# window.clockbotWait. Arguments: the kind of wait ("contents", "ie" or "splash"; see the corresponding click_and_wait_*
+# functions), the css selector of the element whose contents change on a page load, and whether the observer is
+# installed in a new document after the click, rather than in the current document before the click.
+# All times are in milliseconds since the epoch, with the sub-millisecond resolution of performance.now(). The moment
+# of the click is recorded by a click handler, installed once per document, and kept in sessionStorage so that it
+# survives a document change
+js_wait_install = """
+var mode = arguments[0], selector = arguments[1], newDocument = arguments[2] === true;
+var timeOrigin = performance.timeOrigin || performance.timing.navigationStart;
+function now() { return timeOrigin + performance.now(); }
+function storage(name, value) {
+    // sessionStorage is not available in every document; the click time is simply lost there
+    try {
+        if (value === undefined) return sessionStorage.getItem(name);
+        sessionStorage.setItem(name, value);
+    } catch (e) {
+        return null;
+    }
+}
+var page = selector ? document.querySelector(selector) : null;
+var state = window.clockbotWait = {
+    contents: page ? page.textContent : null,
+    splashSeen: false,
+    done: false,
+    callback: null,
+    timeOrigin: timeOrigin,
+    tInstall: now(),
+    tClick: null,
+    tDone: null
+};
+if (newDocument) {
+    // The click replaced the document. Compare with the contents before the click, not with those of the new
+    // document, which may already have been rendered. A splash screen may have come and gone already as well
+    var contents = storage("clockbotContents");
+    state.contents = contents ? JSON.parse(contents) : null;
+    state.splashSeen = true;
+    state.tClick = Number(storage("clockbotClick")) || null;
+} else {
+    performance.clearResourceTimings();
+    storage("clockbotContents", JSON.stringify(state.contents));
+    storage("clockbotClick", "");
+    // One click handler per document, which records the click in the state of the current wait. Pages that load
+    // within the same document get a new state for every navigation, but no new handler
+    if (!window.clockbotClickHandler) {
+        window.clockbotClickHandler = true;
+        document.addEventListener("click", function() {
+            var current = window.clockbotWait;
+            if (current && current.tClick === null) {
+                current.tClick = now();
+                storage("clockbotClick", current.tClick);
+            }
+        }, true);
+    }
+}
+var observer = new MutationObserver(check);
+function check() {
+    if (state.done) return;
+    var splash = document.querySelector(".splash-active") !== null;
+    var ready;
+    if (mode === "splash") {
+        state.splashSeen = state.splashSeen || splash;
+        ready = state.splashSeen && !splash;
+    } else {
+        var page = document.querySelector(selector);
+        ready = page !== null && page.textContent !== state.contents && (mode !== "ie" || !splash);
+    }
+    if (ready) {
+        state.done = true;
+        state.tDone = now();
+        observer.disconnect();
+        if (state.callback) state.callback(state.result());
+    }
+}
+state.result = function() {
+    var tStart = state.tClick !== null ? state.tClick : state.tInstall;
+    var resources = [];
+    var entries = performance.getEntriesByType("resource");
+    for (var i = 0; i < entries.length; i++) {
+        var start = state.timeOrigin + entries[i].startTime;
+        if (start >= tStart && start <= state.tDone) {
+            resources.push({
+                name: entries[i].name,
+                type: entries[i].initiatorType,
+                start: start - tStart,
+                duration: entries[i].duration,
+                size: entries[i].transferSize
+            });
+        }
+    }
+    return { click: state.tClick, done: state.tDone, resources: resources };
+};
+observer.observe(document, { childList: true, subtree: true, characterData: true, attributes: true, attributeFilter: ["class"] });
+check();
+"""
+
+# Asynchronous JavaScript that returns as soon as the observer installed by js_wait_install has seen the page load.
+# If the click replaced the entire document, the observer is gone, and a new one is installed in the new document.
+# Returns the in-page timing of the page load: the moments of the click and of the end of the page load, and the
+# resource timing entries of all requests started in between
+js_wait_done = """
+var callback = arguments[arguments.length - 1];
+if (window.clockbotWait === undefined) {
+    (function() {""" + js_wait_install + """}).call(null, arguments[0], arguments[1], true);
+}
+var state = window.clockbotWait;
+if (state.done) {
+    callback(state.result());
+} else {
+    state.callback = callback;
+}
+"""
+
+# JavaScript that returns everything clockbot needs to know about the current page in a single round trip: the texts
+# of the active menu items (the path to the active page), the number of menu items, whether the first menu item is
+# the active one, and whether there is a next page button. Arguments: css_menu_items, css_menu_active_font,
+# active_font_classname and css_next_page_button from the configuration
+js_page_snapshot = """
+var items = document.querySelectorAll(arguments[0]);
+var active = document.querySelectorAll(arguments[1]);
+var texts = [];
+for (var i = 0; i < active.length; i++) {
+    texts.push((active[i].innerText || "").trim());
+}
+return {
+    active: texts,
+    menu_length: items.length,
+    first_active: items.length > 0 && (items[0].getAttribute("class") || "").indexOf(arguments[2]) >= 0,
+    has_next: document.querySelector(arguments[3]) !== null
+};
+"""
+
+# Snapshot of the current page, as returned by js_page_snapshot. Taken after every navigation
+page_state = None
+
+# In-page timing of the last page load, as returned by js_wait_done. None if the page load was not event-driven
+page_timing = None
+
+# Failure of the current navigation step, e.g. an element that could not be clicked, or None. Failure artifacts are
+# captured by end_step, outside the timed window
+step_failure = None
+
+# Deadline of a navigation step, in seconds (--step-timeout), or None if steps may take forever, the monotonic
+# time at which the current step started, and the number of the menu item it navigates to, if any
+step_timeout = None
+step_start = None
+step_target = None
+
+# Longest time, in seconds, that a single asynchronous script waits for a page load. The script is called again
+# until the page has loaded, so that the deadline of the step is checked in between
+script_wait_slice = 5.0
+
+# The most recent log events, which are saved with the failure artifacts
+recent_events = deque(maxlen = 50)
+
+# Background thread that writes the failure artifacts; None if artifacts are not saved
+artifact_writer = None
+
+# Metrics of the campaign in progress, served over HTTP with --metrics-port. None if they are not served
+live_metrics = None
+
+# Log formats. "Text" is one human-readable line per event. "Jsonl" is one JSON object per event, with the event
+# (i.e., the message), the wall clock time, a monotonic time stamp, and fields such as username, browser and item
+log_formats = [
+    "text",
+    "jsonl"
+]
+
+# When the log file is synced to disk: after every event, after every run, or only when the log is closed
+fsync_policies = [
+    "event",
+    "run",
+    "close"
 ]
 
 log_file = sys.stdout
+log_writer = None
+
+# Fields that are added to every event in the jsonl log format, e.g. the current username and browser
+log_context = {}
 
-def parse_arguments():
+def parse_arguments(argv = None):
     """
     Parse the command line arguments. See code for details on arguments, and names of variables in which argument values are stored
     (not repeated here to avoid the risk of comment and code becoming inconsistent)
 
+    argv: list of arguments to parse. Default: the arguments of the program
+
     Returns: the arguments, parsed
     """
     parser = argparse.ArgumentParser(description = "Measure how fast questionnaire pages load in different browsers")
@@ -62,11 +315,68 @@ def parse_arguments():
     parser.add_argument("-t", dest = "traversal_method", choices = methods, default = methods[0], help = "Questionnaire traversal method. Default: %(default)s.")
     parser.add_argument("-o", dest = "output_filename", default = None, help = "Filename of output file. Default: dump to console.")
     parser.add_argument("-n", dest = "n_runs", type = int, default = 1, help = "Number of runs for each questionnaire. Default: %(default)i.")
+    parser.add_argument("--precision", dest = "precision", type = float, default = None, help = "Adaptive mode: instead of -n runs per questionnaire, keep doing runs until the 95%% confidence interval of the median load time of every page is at most this wide on either side, in ms.")
+    parser.add_argument("--budget", dest = "budget", type = int, default = None, help = "Adaptive mode: maximum number of runs.")
+    parser.add_argument("--min-samples", dest = "min_samples", type = int, default = 10, help = "Adaptive mode: minimum number of load times of each page. Default: %(default)i.")
     parser.add_argument("-c", dest = "config", default = "ps2", help = "Configuration to use. Default: %(default)s.")
-    args = parser.parse_args()
+    parser.add_argument("-w", dest = "wait_mode", choices = wait_modes, default = wait_modes[0], help = "How to detect that a page has loaded: by polling the page from Python, or by an event handler in the page. Default: %(default)s.")
+    parser.add_argument("-s", dest = "session_mode", choices = session_modes, default = session_modes[0], help = "Start a fresh browser for every run, or reuse one browser for all runs. Default: %(default)s.")
+    parser.add_argument("--cache", dest = "cache_mode", choices = cache_modes, default = cache_modes[0], help = "Start browsers with a fresh profile, or with a persisted profile that keeps its cache. Default: %(default)s.")
+    parser.add_argument("--profile-dir", dest = "profile_dir", default = "profiles", help = "Directory of the persisted browser profiles of --cache warm. Default: %(default)s.")
+    parser.add_argument("--warm-up", dest = "warm_up", action = "store_true", help = "Do a traversal that is not measured before the first run of each browser session, to fill the cache.")
+    parser.add_argument("--headless", dest = "headless", action = "store_true", help = "Run the browser without a window (Firefox, Chrome and Edge only).")
+    parser.add_argument("--window-size", dest = "window_size", type = window_size, default = None, help = "Size of the browser window, as WIDTHxHEIGHT. Default: maximized, or 1920x1080 when headless.")
+    parser.add_argument("--page-load-strategy", dest = "page_load_strategy", choices = page_load_strategies, default = page_load_strategies[0], help = "WebDriver page load strategy. Default: %(default)s.")
+    parser.add_argument("--block-images", dest = "block_images", action = "store_true", help = "Do not load images (Firefox, Chrome and Edge only).")
+    parser.add_argument("--block-fonts", dest = "block_fonts", action = "store_true", help = "Do not load web fonts (Firefox, Chrome and Edge only).")
+    parser.add_argument("--network-profile", dest = "network_profile", choices = list(throttleproxy.network_profiles.keys()), default = None, help = "Emulate the latency and bandwidth of this network profile: in the browser itself (Chrome and Edge), or with a throttling proxy (other browsers). Default: no emulation.")
+    parser.add_argument("--network-log", dest = "network_log", action = "store_true", help = "Log the number of requests, bytes, time to first byte and script and render time of each step (Chrome and Edge only).")
+    parser.add_argument("--log-format", dest = "log_format", choices = log_formats, default = log_formats[0], help = "Format of the log file. Default: %(default)s.")
+    parser.add_argument("--fsync", dest = "fsync_policy", choices = fsync_policies, default = fsync_policies[0], help = "When to sync the log file to disk: after every event, after every run, or at the end. Default: %(default)s.")
+    parser.add_argument("-j", dest = "n_workers", type = int, default = 1, help = "Number of worker processes, each with its own browser and log file; with the async backend, the number of concurrent browser sessions. Default: %(default)i.")
+    parser.add_argument("--campaign", dest = "campaign", default = None, help = "Name of the measurement campaign, under which the analyzer stores the results.")
+    parser.add_argument("--state", dest = "state_filename", default = None, help = "Campaign state file, which records the completed runs. Default: name of the output file, with _state.jsonl appended.")
+    parser.add_argument("--resume", dest = "resume", action = "store_true", help = "Resume an interrupted campaign: skip the runs recorded in the campaign state file, and append to the log files.")
+    parser.add_argument("--load", dest = "load", action = "store_true", help = "Load test: run load_steps[i] concurrent simulated respondents for load_step_duration seconds per step, as set in the configuration. Uses the async backend.")
+    parser.add_argument("--detect-anomalies", dest = "detect_anomalies", action = "store_true", help = "Log an alert when the load times of a page rise significantly above its baseline, which is learned during the run unless given with --baseline.")
+    parser.add_argument("--baseline", dest = "baseline_filename", default = None, help = "Baseline of the load times per configuration and page, written by analyzer.py baseline. Implies --detect-anomalies.")
+    parser.add_argument("--alert-threshold", dest = "alert_threshold", type = float, default = 3.0, help = "Control limit of the anomaly detector, in standard deviations. Default: %(default)s.")
+    parser.add_argument("--step-timeout", dest = "step_timeout", type = float, default = 300, help = "Deadline of a navigation step, in seconds. A step that takes longer is logged as a timeout, the browser is closed, and clockbot moves on to the next run. 0 waits forever. Default: %(default)s.")
+    parser.add_argument("--artifact-dir", dest = "artifact_dir", default = "artifacts", help = "Directory of the failure artifacts: a screenshot, the page source and the last log events of every step that failed. Default: %(default)s.")
+    parser.add_argument("--artifact-max-mb", dest = "artifact_max_mb", type = float, default = 100, help = "Maximum total size of the failure artifacts; the oldest are removed. 0 saves no artifacts. Default: %(default)s.")
+    parser.add_argument("--artifact-log-events", dest = "artifact_log_events", type = int, default = 50, help = "Number of log events saved with each failure artifact. Default: %(default)i.")
+    parser.add_argument("--metrics-port", dest = "metrics_port", type = int, default = None, help = "Serve live metrics of the campaign on this port of localhost, at /metrics (Prometheus) and /metrics.json. 0 picks a free port.")
+    parser.add_argument("--backend", dest = "backend", choices = backends, default = backends[0], help = "Webdriver client. Default: %(default)s.")
+    parser.add_argument("--webdriver-url", dest = "webdriver_url", default = "http://127.0.0.1:4444", help = "URL of the webdriver server (e.g. chromedriver --port=4444, or a Selenium server for Firefox) for the async backend. Default: %(default)s.")
+    args = parser.parse_args(argv)
+
+    if args.n_workers < 1:
+        parser.error("number of workers must be at least 1")
+    if args.warm_up and args.cache_mode == "cold" and args.session_mode == "fresh":
+        parser.error("--warm-up has no effect with a fresh browser with an empty cache for every run; use --cache warm or -s reuse")
+    if args.precision is not None and args.budget is None:
+        parser.error("--precision requires a run budget (--budget)")
+    if args.precision is not None and args.load:
+        parser.error("--precision cannot be combined with --load")
+    if args.resume and state_filename(args) is None:
+        parser.error("--resume requires a campaign state file (--state) or an output file (-o)")
+    if (args.backend == "async" or args.load) and args.log_format != "jsonl":
+        parser.error("the async backend and load tests require --log-format jsonl, to tell the interleaved events of concurrent sessions apart")
+    if args.n_workers > 1 and args.backend == "selenium" and args.output_filename is None:
+        parser.error("-j requires an output file (-o), since each worker writes its own log file")
 
     return args
 
+def window_size(s):
+    """
+    Parses a window size of the form WIDTHxHEIGHT, e.g. 1920x1080, into a tuple of integers
+    """
+    try:
+        width, height = s.lower().split("x")
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid window size: {s}")
+
 def read_credentials(filename):
     """
     Read a file with user names and passwords. This file must be a csv file, with ; as separators. The csv
@@ -85,28 +395,391 @@ def read_credentials(filename):
     log("Reading credentials complete")
     return result
 
-def log_init(filename):
-    global log_file
+def load_config(name):
+    """
+    Loads the configuration file config-<name>.py. The configuration is executed in the global namespace of this
+    module, so that the selectors and the click_and_wait function it defines are available to all functions below
+
+    name (string): name of the configuration
+    """
+    config_filename = "config-" + name + ".py"
+    with open(config_filename, "r", encoding = "utf-8") as f_in:
+        exec(f_in.read(), globals())
+
+def format_event(event, log_format = "text"):
+    """
+    Formats a log event as a line of the log file
+
+    event: tuple of wall clock time, monotonic time, message and dict of fields, as created by log()
+    log_format (string): one of the values in log_formats
+    """
+    t, mono, msg, fields = event
+    if log_format == "jsonl":
+        return json.dumps({ "time": t, "mono": mono, "event": msg, **fields }, ensure_ascii = False) + "\n"
+
+    lt = localtime(t)
+    ms, _ = math.modf(t)
+    ms = int(1000 * ms)
+    return strftime("%Y-%m-%d %H:%M:%S", lt) + "." + "{:03d} {:.6f}".format(ms, t) + " " + msg + "\n"
+
+class LogWriter(threading.Thread):
+    """
+    Background thread that writes log events to the log file, so that formatting, writing and syncing the log
+    happen outside the time windows that are measured. Events are written in batches: whatever has been queued
+    since the last write. Whether the file is synced after every event, every run, or only when the log is closed,
+    depends on the fsync policy
+    """
+    def __init__(self, f_out, log_format = "text", fsync_policy = "event"):
+        super().__init__(daemon = True)
+        self.f_out = f_out
+        self.log_format = log_format
+        self.fsync_policy = fsync_policy
+        self.events = queue.Queue()
+        # Functions that are called with every line written, e.g. to extract the load times while the log is written
+        self.listeners = []
+
+    def run(self):
+        closing = False
+        while not closing:
+            batch = [ self.events.get() ]
+            try:
+                while True:
+                    batch.append(self.events.get_nowait())
+            except queue.Empty:
+                pass
+
+            sync = False
+            synced = []
+            for event in batch:
+                if event is None:
+                    closing = True
+                elif event == "sync":
+                    sync = sync or self.fsync_policy == "run"
+                elif isinstance(event, threading.Event):
+                    sync = True
+                    synced.append(event)
+                else:
+                    line = format_event(event, self.log_format)
+                    self.f_out.write(line)
+                    for listener in self.listeners:
+                        listener(line)
+                    sync = sync or self.fsync_policy == "event"
+            self.f_out.flush()
+            if (sync or closing) and self.f_out.fileno() != 1: # don't fsync stdout
+                os.fsync(self.f_out.fileno())
+            for event in synced:
+                event.set()
+
+def log_init(filename, log_format = "text", fsync_policy = "event", append = False):
+    """
+    Opens the log file and starts the background thread that writes it
+
+    filename (string): name of the log file, or None to log to the console
+    log_format (string): one of the values in log_formats
+    fsync_policy (string): one of the values in fsync_policies
+    append (boolean): whether to append to an existing log file, e.g. when resuming a campaign
+    """
+    global log_file, log_writer
 
     if filename is not None:
-        log_file = open(filename, "w", encoding = "utf-8", buffering = 1)
+        log_file = open(filename, "a" if append else "w", encoding = "utf-8")
+        # The last line of a log that is appended to may have been cut off when clockbot was interrupted
+        if append and log_file.tell() > 0:
+            with open(filename, "rb") as f_in:
+                f_in.seek(-1, os.SEEK_END)
+                if f_in.read(1) != b"\n":
+                    log_file.write("\n")
+    log_writer = LogWriter(log_file, log_format, fsync_policy)
+    log_writer.start()
+
+def log_sync(wait = False):
+    """
+    Marks the end of a run in the log. With fsync policy "run", the log file is synced to disk at this point
+
+    wait (boolean): if True, the log file is synced regardless of the fsync policy, and log_sync waits until all
+        events logged so far are on disk
+    """
+    if log_writer is not None:
+        if wait:
+            synced = threading.Event()
+            log_writer.events.put(synced)
+            synced.wait()
+        else:
+            log_writer.events.put("sync")
+
+def log_close():
+    """
+    Writes all pending log events, syncs the log file to disk and closes it
+    """
+    global log_writer
+
+    if log_writer is not None:
+        log_writer.events.put(None)
+        log_writer.join()
+        log_writer = None
+    if log_file is not sys.stdout:
+        log_file.close()
+
+class ArtifactWriter(threading.Thread):
+    """
+    Background thread that writes failure artifacts. Each artifact is a directory with a screenshot, the page source
+    and the last log events of a failed step. When the artifacts together take more than max_bytes, the oldest are
+    removed, so that the artifact directory is a ring buffer of the most recent failures. Worker processes share the
+    directory, so artifacts may disappear while they are counted
+    """
+    def __init__(self, directory, max_bytes, log_format = "text"):
+        super().__init__(daemon = True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.log_format = log_format
+        self.artifacts = queue.Queue()
+        self.n_artifacts = 0
+
+    def run(self):
+        for name, files in iter(self.artifacts.get, None):
+            path = os.path.join(self.directory, name)
+            os.makedirs(path, exist_ok = True)
+            for filename, data in files.items():
+                if data is not None:
+                    with open(os.path.join(path, filename), "wb") as f_out:
+                        f_out.write(data)
+            self.trim()
+
+    def trim(self):
+        artifacts = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                size = sum(os.path.getsize(os.path.join(path, filename)) for filename in os.listdir(path))
+                artifacts.append((os.path.getmtime(path), path, size))
+            except OSError:
+                continue
+        artifacts.sort()
+        total = sum(size for _, _, size in artifacts)
+        # The newest artifact is always kept, even if it is larger than max_bytes by itself
+        while total > self.max_bytes and len(artifacts) > 1:
+            _, path, size = artifacts.pop(0)
+            shutil.rmtree(path, ignore_errors = True)
+            total -= size
+
+    def add(self, reason, screenshot, page_source, events, fields):
+        """
+        Queues a failure artifact. The name of the artifact has the time, a sequence number, and the user name, run
+        number and item of the failed step
+
+        reason (string): description of the failure
+        screenshot: PNG data of the screenshot, or None
+        page_source (string): source of the page, or None
+        events: list of log events, as created by log()
+        fields: log context of the failed step, with username, run and item
+        """
+        t = time()
+        self.n_artifacts += 1
+        name = strftime("%Y%m%d_%H%M%S", localtime(t)) + "_{:03d}_{:d}".format(int(1000 * math.modf(t)[0]), self.n_artifacts)
+        for field in ["username", "run", "item"]:
+            if fields.get(field) is not None:
+                name += "_" + re.sub(r"[^\w.-]+", "_", str(fields[field]))[:40]
+        self.artifacts.put((name, {
+            "screenshot.png": screenshot,
+            "page.html": None if page_source is None else page_source.encode("utf-8"),
+            "reason.txt": reason.encode("utf-8"),
+            "log" + (".jsonl" if self.log_format == "jsonl" else ".txt"): "".join(format_event(event, self.log_format) for event in events).encode("utf-8")
+        }))
+
+def artifacts_init(args):
+    """
+    Starts the thread that writes the failure artifacts, unless --artifact-max-mb is 0
+
+    args: the parsed command line arguments
+    """
+    global artifact_writer, recent_events
+
+    recent_events = deque(maxlen = args.artifact_log_events)
+    if args.artifact_max_mb > 0:
+        os.makedirs(args.artifact_dir, exist_ok = True)
+        artifact_writer = ArtifactWriter(args.artifact_dir, int(args.artifact_max_mb * 1024 * 1024), args.log_format)
+        artifact_writer.start()
+
+def artifacts_close():
+    """
+    Writes the pending failure artifacts
+    """
+    global artifact_writer
+
+    if artifact_writer is not None:
+        artifact_writer.artifacts.put(None)
+        artifact_writer.join()
+        artifact_writer = None
+
+def capture_failure(driver, reason):
+    """
+    Captures the failure artifacts of the current step: a screenshot, the page source and the last log events. Called
+    by end_step, after the end of the step has been logged. Only taking the screenshot and the page source is done
+    here; the files are written by the artifact writer thread
+
+    driver: webdriver instance
+    reason (string): description of the failure
+    """
+    log("Capturing failure artifacts: " + reason)
+    if artifact_writer is None:
+        return
+    try:
+        screenshot = driver.get_screenshot_as_png()
+    except WebDriverException:
+        screenshot = None
+    try:
+        page_source = driver.page_source
+    except WebDriverException:
+        page_source = None
+    artifact_writer.add(reason, screenshot, page_source, list(recent_events), dict(log_context))
+
+def worker_log_filename(filename, worker_nr):
+    """
+    Returns the name of the log file of a worker process, which is the name of the main log file with
+    the worker number appended, e.g. "run.log" becomes "run_w1.log"
+
+    filename (string): name of the main log file
+    worker_nr (integer): number of the worker, starting at 1
+    """
+    base, ext = os.path.splitext(filename)
+    return f"{base}_w{worker_nr}{ext}"
+
+def start_metrics(args):
+    """
+    Starts serving the live metrics of the campaign; see metrics.py. The metrics are taken from the lines of the log
+    as they are written, and from the log files of the worker processes; see follow_worker_logs
+
+    args: the parsed command line arguments
+    """
+    global live_metrics
+
+    live_metrics = metrics.Metrics()
+    log_writer.listeners.append(metrics.MetricsLogMiner(live_metrics).process_line)
+    server = metrics.start_metrics_server(live_metrics, args.metrics_port)
+    log("Metrics endpoint: http://127.0.0.1:{:d}/metrics".format(server.server_address[1]))
+
+def follow_worker_logs(args, n_workers):
+    """
+    Adds the log files of the worker processes to the live metrics, if these are served. Called before the workers
+    start. The log files of an earlier campaign are removed, as the workers would overwrite them anyway, so that
+    none of their lines are counted; when a campaign is resumed, only the lines appended from now on are counted
 
-def log(msg):
+    args: the parsed command line arguments
+    n_workers (integer): number of worker processes
+    """
+    if live_metrics is None:
+        return
+    for i in range(n_workers):
+        filename = worker_log_filename(args.output_filename, i + 1)
+        offset = 0
+        if os.path.exists(filename):
+            if args.resume:
+                offset = os.path.getsize(filename)
+            else:
+                os.remove(filename)
+        metrics.follow_log(filename, live_metrics, offset)
+
+def state_filename(args):
+    """
+    Returns the name of the campaign state file: the file given with --state, or the name of the log file with
+    _state.jsonl appended. None if there is neither
+    """
+    if args.state_filename is not None:
+        return args.state_filename
+    if args.output_filename is not None:
+        return os.path.splitext(args.output_filename)[0] + "_state.jsonl"
+    return None
+
+def read_campaign_state(filename):
+    """
+    Reads the campaign state file, which has one JSON object for each completed run
+
+    filename (string): name of the campaign state file
+
+    Returns: set of (username, run number) tuples of the completed runs
+    """
+    done = set()
+    if os.path.exists(filename):
+        with open(filename, "r", encoding = "utf-8") as f_in:
+            for line in f_in:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line may be incomplete if clockbot was interrupted while writing it
+                    continue
+                done.add((record["username"], record["run"]))
+    return done
+
+def mark_run_complete(filename, username, run_nr):
+    """
+    Adds a completed run to the campaign state file. The file is synced to disk, so that a completed run is
+    never done again after a crash. Worker processes append to the same file; each record is a single write
+
+    filename (string): name of the campaign state file
+    username (string): user name of the run
+    run_nr (integer): run number, starting at 1
+    """
+    with open(filename, "a", encoding = "utf-8") as f_out:
+        f_out.write(json.dumps({ "username": username, "run": run_nr, "time": time() }) + "\n")
+        f_out.flush()
+        os.fsync(f_out.fileno())
+
+def log(msg, **fields):
     """
     logs a message to the log file. The message is preceded by human-readable date & time, and timestamp in machine-friendly format.
     The data & time on the one hand, and the timestamp on the other, are guaranteed to be the same moment, up to the same
-    millisecond
+    millisecond. The event is only time stamped here; it is written to the log file by the log writer thread
 
     msg: (string) the message to log
+    fields: additional data for the jsonl log format. In the text log format, these are appended to the message as JSON
     """
     t = time()
-    lt = localtime(t)
-    ms, _ = math.modf(t)
-    ms = int(1000 * ms)
-    log_file.write(strftime("%Y-%m-%d %H:%M:%S", lt) + "." + "{:03d} {:.6f}".format(ms, t) + " " + msg + "\n")
-    log_file.flush()
-    if log_file.fileno() != 1: # don't fsync stdout
-        os.fsync(log_file.fileno())
+    mono = monotonic()
+    if fields and (log_writer is None or log_writer.log_format == "text"):
+        msg += ": " + json.dumps(fields)
+    event = (t, mono, msg, { **log_context, **fields })
+    recent_events.append(event)
+    if log_writer is None:
+        log_file.write(format_event(event))
+    else:
+        log_writer.events.put(event)
+
+class StepTimeout(Exception):
+    """
+    A navigation step did not complete before its deadline; see check_deadline
+    """
+    def __init__(self, elapsed):
+        super().__init__("Step timeout after {:.3f} s".format(elapsed))
+        self.elapsed = elapsed
+
+def check_deadline():
+    """
+    Raises StepTimeout if the current navigation step has taken longer than step_timeout. Called by the loops that
+    wait for a page to load
+    """
+    if step_timeout is not None and step_start is not None:
+        elapsed = monotonic() - step_start
+        if elapsed > step_timeout:
+            raise StepTimeout(elapsed)
+
+def script_wait_timeout(start):
+    """
+    Returns the script timeout, in seconds, for the next wait for a page load in a step that started at the given
+    monotonic time: at most script_wait_slice, and no longer than the time left until the deadline of the step
+    """
+    if step_timeout is None or start is None:
+        return script_wait_slice
+    return max(0.001, min(script_wait_slice, step_timeout - (monotonic() - start)))
+
+def fail_step(reason):
+    """
+    Marks the current navigation step as failed. The failure artifacts are captured when the step has ended; see end_step
+
+    reason (string): description of the failure
+    """
+    global step_failure
+
+    step_failure = reason
 
 def click_and_wait_contents(driver, element):
     """
@@ -135,7 +808,7 @@ def click_and_wait_contents(driver, element):
         ElementNotVisibleException) as e:
 
         log(f"{e}: Element cannot be clicked")
-        driver.save_screenshot("screenshot.png")
+        fail_step("Element cannot be clicked: " + str(e))
         return
 
     while True:
@@ -147,6 +820,7 @@ def click_and_wait_contents(driver, element):
                 break
         except:
             pass
+        check_deadline()
         sleep(0.01)
 
 
@@ -177,7 +851,7 @@ def click_and_wait_ie(driver, element):
         ElementNotVisibleException) as e:
 
         log(f"{e}: Element cannot be clicked")
-        driver.save_screenshot("screenshot.png")
+        fail_step("Element cannot be clicked: " + str(e))
         return
 
     while True:
@@ -189,6 +863,7 @@ def click_and_wait_ie(driver, element):
                 break
         except:
             pass
+        check_deadline()
         sleep(0.01)
     while True:
         try:
@@ -197,6 +872,7 @@ def click_and_wait_ie(driver, element):
         except:
             #print("splash disappeared")
             break
+        check_deadline()
         sleep(0.01)
 
 
@@ -216,6 +892,7 @@ def click_and_wait_splash(driver, element):
         ElementNotVisibleException) as e:
 
         log(f"{e}: Element cannot be clicked")
+        fail_step("Element cannot be clicked: " + str(e))
         return
 
     while True:
@@ -226,6 +903,7 @@ def click_and_wait_splash(driver, element):
         except:
             #print("splash not found")
             pass
+        check_deadline()
         sleep(0.01)
 
     while True:
@@ -235,29 +913,480 @@ def click_and_wait_splash(driver, element):
         except:
             #print("splash disappeared")
             break
+        check_deadline()
         sleep(0.01)
 
-    
 
-def startup(browser_name = "firefox"):
+def click_and_wait_event(driver, element, mode):
+    """
+    Clicks the given element, and waits for the page to load, using an event handler in the page instead of polling
+    from Python. Before the click, a MutationObserver is installed that detects the same page changes as the
+    click_and_wait_* function corresponding to mode. After the click, a single asynchronous script call waits for
+    the observer to fire. This costs two webdriver round trips per page load instead of two per 10 ms, and the
+    moment of detection is determined by the browser instead of by the polling interval.
+    The in-page timing of the page load is stored in page_timing, to be logged by end_step
+
+    driver: webdriver instance
+    element: webdriver element instance; element on the web page that is to be clicked
+    mode (string): "contents", "ie" or "splash"
+    """
+    global page_timing
+
+    selector = css_wait_full_page if mode != "splash" else None
+    page_timing = None
+
+    try:
+        driver.execute_script(js_wait_install, mode, selector)
+    except WebDriverException:
+        pass
+
+    try:
+        element.click()
+    except (
+        ElementClickInterceptedException, 
+        ElementNotInteractableException, 
+        ElementNotVisibleException) as e:
+
+        log(f"{e}: Element cannot be clicked")
+        fail_step("Element cannot be clicked: " + str(e))
+        return
+
+    while True:
+        try:
+            driver.set_script_timeout(script_wait_timeout(step_start))
+            page_timing = driver.execute_async_script(js_wait_done, mode, selector)
+            break
+        except (TimeoutException, JavascriptException):
+            # The document was replaced while the script was waiting, or the script timed out. Either way,
+            # wait again; the script installs a new observer if necessary. Other errors, e.g. a browser that
+            # crashed, are not going to go away by waiting
+            check_deadline()
+
+def click_and_wait_contents_event(driver, element):
+    """
+    Event-driven version of click_and_wait_contents
+    """
+    click_and_wait_event(driver, element, "contents")
+
+def click_and_wait_ie_event(driver, element):
+    """
+    Event-driven version of click_and_wait_ie
+    """
+    click_and_wait_event(driver, element, "ie")
+
+def click_and_wait_splash_event(driver, element):
+    """
+    Event-driven version of click_and_wait_splash
+    """
+    click_and_wait_event(driver, element, "splash")
+
+# Event-driven equivalents of the polling click_and_wait_* functions that can be selected in the configuration files
+event_wait_functions = {
+    click_and_wait_contents: click_and_wait_contents_event,
+    click_and_wait_ie: click_and_wait_ie_event,
+    click_and_wait_splash: click_and_wait_splash_event
+}
+
+def set_wait_mode(mode):
+    """
+    Selects how page loads are detected, by replacing the click_and_wait function chosen in the configuration
+    by its event-driven equivalent if necessary. Must be called after load_config
+
+    mode (string): one of the values in wait_modes
+    """
+    global click_and_wait
+
+    log("Wait mode: " + mode)
+    if mode == "event":
+        click_and_wait = event_wait_functions[click_and_wait]
+
+class CommandStats:
+    """
+    Counts and times the webdriver commands issued during a navigation step. Also records how long after the
+    start of the step the click was issued: everything the harness does before the click delays the click, and
+    thus adds to the measured load time, whereas commands after the click overlap with loading the page
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.start = perf_counter()
+        self.commands = {}
+        self.click_offset = None
+
+    def add(self, command, start, end):
+        count, elapsed = self.commands.get(command, (0, 0.0))
+        self.commands[command] = (count + 1, elapsed + end - start)
+        if command == Command.CLICK_ELEMENT and self.click_offset is None:
+            self.click_offset = start - self.start
+
+    def count(self):
+        return sum(count for count, _ in self.commands.values())
+
+    def time(self):
+        return sum(elapsed for _, elapsed in self.commands.values())
+
+def instrument(driver):
+    """
+    Instruments a webdriver instance, so that every command it issues is counted and timed in driver.command_stats.
+    All webdriver commands, including those of elements found through the driver, go through driver.execute,
+    which is wrapped here
+
+    driver: webdriver instance
+
+    Returns: the same webdriver instance
+    """
+    stats = CommandStats()
+    execute = driver.execute
+
+    def timed_execute(driver_command, params = None):
+        start = perf_counter()
+        try:
+            return execute(driver_command, params)
+        finally:
+            stats.add(driver_command, start, perf_counter())
+
+    driver.execute = timed_execute
+    driver.command_stats = stats
+    return driver
+
+def performance_metrics(result):
+    """
+    Converts the result of the Performance.getMetrics command of the Chrome DevTools Protocol to a dict of metric
+    name to value
+    """
+    return { metric["name"]: metric["value"] for metric in result["metrics"] }
+
+def network_breakdown(entries, metrics_before, metrics_after):
+    """
+    Summarizes the network requests in the performance log of a navigation step, and the script and render time
+    of the step
+
+    entries: performance log entries of the step, as returned by driver.get_log("performance")
+    metrics_before, metrics_after: performance metrics at the start and at the end of the step; see performance_metrics
+
+    Returns: dict with the number of requests, the number of bytes transferred, the longest time to first byte of
+    the requests (from sending the request to receiving the response headers), and the script and render time.
+    Times are in ms
+    """
+    requests = 0
+    n_bytes = 0
+    ttfb = None
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        params = message.get("params", {})
+        if message["method"] == "Network.requestWillBeSent":
+            if not params["request"]["url"].startswith("data:"):
+                requests += 1
+        elif message["method"] == "Network.loadingFinished":
+            n_bytes += params.get("encodedDataLength", 0)
+        elif message["method"] == "Network.responseReceived":
+            # Responses from the memory cache have no timing
+            timing = params["response"].get("timing")
+            if timing is not None:
+                wait = timing["receiveHeadersEnd"] - timing["sendEnd"]
+                ttfb = wait if ttfb is None else max(ttfb, wait)
+
+    def duration(names):
+        return round(1000 * sum(metrics_after.get(name, 0) - metrics_before.get(name, 0) for name in names), 3)
+
+    return {
+        "requests": requests,
+        "bytes": int(n_bytes),
+        "ttfb_ms": None if ttfb is None else round(ttfb, 3),
+        "script_ms": duration(script_metrics),
+        "render_ms": duration(render_metrics)
+    }
+
+def begin_step(driver, target = None):
+    """
+    Starts a navigation step. Called just before the start of the step is logged. With --network-log, the
+    performance log entries of earlier requests are discarded, and the performance metrics are read, so that
+    the step only gets the requests and the script and render time that follow. The deadline of the step is
+    counted from here
+
+    driver: webdriver instance
+    target (integer): number of the menu item that the step navigates to, or None if it is not a menu item
+    """
+    global step_failure, step_start, step_target
+
+    if driver.network_log:
+        driver.get_log("performance")
+        driver.step_metrics = performance_metrics(driver.execute_cdp_cmd("Performance.getMetrics", {}))
+    step_failure = None
+    driver.command_stats.reset()
+    step_start = monotonic()
+    step_target = target
+
+def end_step(driver):
+    """
+    Logs the details of the navigation step that has just completed. Called after "Navigation complete" has been
+    logged, so that none of this adds to the page load time measured from the log time stamps.
+    The number and duration of the webdriver commands issued during the step are logged, and how long after the
+    start of the step the click was issued, which is the part of the harness overhead that adds to the load time.
+    If the page load was detected by an event handler in the page, the page load time measured in the page is logged,
+    i.e., the time from the click to the change of the page contents, and the resource timing entries of the requests
+    done in the meantime. With --network-log, the network breakdown of the step is logged; see network_breakdown.
+    If the step failed, the failure artifacts are captured; see capture_failure
+
+    driver: webdriver instance
+    """
+    global page_timing, step_failure
+
+    log_step_details(driver.command_stats, page_timing)
+    page_timing = None
+    if driver.network_log:
+        log("Network breakdown", **network_breakdown(driver.get_log("performance"), driver.step_metrics,
+                                                     performance_metrics(driver.execute_cdp_cmd("Performance.getMetrics", {}))))
+    if step_failure is not None:
+        capture_failure(driver, step_failure)
+        step_failure = None
+
+def log_step_details(stats, timing, **fields):
+    """
+    Logs the webdriver command statistics and the in-page timing of a navigation step; see end_step
+
+    stats: CommandStats instance
+    timing: in-page timing, as returned by js_wait_done, or None
+    fields: additional fields of the log events
+    """
+    log("WebDriver commands",
+        count = stats.count(),
+        time_ms = round(1000 * stats.time(), 3),
+        before_click_ms = None if stats.click_offset is None else round(1000 * stats.click_offset, 3),
+        commands = { command: [ count, round(1000 * elapsed, 3) ] for command, (count, elapsed) in stats.commands.items() },
+        **fields)
+
+    if timing is not None:
+        if timing["click"] is not None:
+            log("In-page load time: {:.3f} ms".format(timing["done"] - timing["click"]), **fields)
+        log("Resource timing", resources = timing["resources"], **fields)
+
+def firefox_options(headless, page_load_strategy, block_images, block_fonts):
+    """
+    Returns the options for starting Firefox with the given settings
+    """
+    options = webdriver.FirefoxOptions()
+    if headless:
+        options.add_argument("-headless")
+    options.set_capability("pageLoadStrategy", page_load_strategy)
+    if block_images:
+        options.set_preference("permissions.default.image", 2)
+    if block_fonts:
+        options.set_preference("browser.display.use_document_fonts", 0)
+    return options
+
+def chromium_options(options, headless, page_load_strategy, block_images, block_fonts):
+    """
+    Sets the options for starting Chrome or Edge with the given settings. Fonts cannot be blocked through the
+    options; see startup()
+    """
+    if headless:
+        options.add_argument("--headless")
+    options.set_capability("pageLoadStrategy", page_load_strategy)
+    if block_images:
+        options.add_experimental_option("prefs", { "profile.managed_default_content_settings.images": 2 })
+    return options
+
+def ie_options(headless, page_load_strategy, block_images, block_fonts):
+    """
+    Returns the options for starting Internet Explorer with the given settings. Internet Explorer cannot run
+    headless, or block images or fonts
+    """
+    if headless or block_images or block_fonts:
+        log("Headless mode and blocking images and fonts are not supported by Internet Explorer")
+    options = webdriver.IeOptions()
+    options.set_capability("pageLoadStrategy", page_load_strategy)
+    return options
+
+def chrome_options(*settings):
+    return chromium_options(webdriver.ChromeOptions(), *settings)
+
+def edge_options(*settings):
+    return chromium_options(webdriver.EdgeOptions(), *settings)
+
+# Functions that return the browser options, per browser
+browser_options = {
+    "firefox": firefox_options,
+    "chrome": chrome_options,
+    "ie": ie_options,
+    "edge": edge_options
+}
+
+def enable_network_log(options, browser_name):
+    """
+    Enables the performance log, which has an entry for every event of every network request, in the options of a
+    Chromium-based browser
+
+    Returns: whether the browser supports the performance log
+    """
+    if browser_name not in chromium_vendor_prefixes:
+        log("The network log is only supported by Chrome and Edge")
+        return False
+    options.set_capability(chromium_vendor_prefixes[browser_name] + ":loggingPrefs", { "performance": "ALL" })
+    return True
+
+def network_conditions(profile):
+    """
+    Returns the parameters of the Chrome DevTools Protocol command Network.emulateNetworkConditions for the given
+    network profile, one of the keys of throttleproxy.network_profiles. Throughputs are in bytes per second
+    """
+    settings = throttleproxy.network_profiles[profile]
+    return {
+        "offline": False,
+        "latency": settings["latency_ms"],
+        "downloadThroughput": settings["download_kbps"] * 1000 / 8,
+        "uploadThroughput": settings["upload_kbps"] * 1000 / 8
+    }
+
+def use_throttling_proxy(options, browser_name, profile):
+    """
+    Starts a throttling proxy that emulates the given network profile, and sets the browser options to use it. For
+    the browsers that cannot emulate network conditions themselves, i.e. all but Chrome and Edge
+
+    Returns: ThrottlingProxy instance. It must be shut down when the browser is closed
+    """
+    proxy = throttleproxy.ThrottlingProxy(**throttleproxy.network_profiles[profile]).start()
+    if browser_name == "firefox":
+        options.set_preference("network.proxy.type", 1)
+        for scheme in ["http", "ssl"]:
+            options.set_preference(f"network.proxy.{scheme}", "127.0.0.1")
+            options.set_preference(f"network.proxy.{scheme}_port", proxy.port)
+        # Firefox does not send requests to localhost, e.g. the local test server, through a proxy by default
+        options.set_preference("network.proxy.no_proxies_on", "")
+        options.set_preference("network.proxy.allow_hijacking_localhost", True)
+    else:
+        address = "127.0.0.1:{:d}".format(proxy.port)
+        options.set_capability("proxy", { "proxyType": "manual", "httpProxy": address, "sslProxy": address })
+        if browser_name == "ie":
+            # Without this, Internet Explorer changes the proxy settings of the whole system
+            options.use_per_process_proxy = True
+    return proxy
+
+def use_profile(options, browser_name, profile):
+    """
+    Sets the browser options to use the given profile directory, which is created if it does not exist. The browser
+    uses the directory itself, not a copy, so that its cache persists after the browser is closed
+
+    Returns: whether the browser supports persisted profiles
+    """
+    if browser_name == "ie":
+        log("Persisted profiles are not supported by Internet Explorer")
+        return False
+    os.makedirs(profile, exist_ok = True)
+    if browser_name == "firefox":
+        options.add_argument("-profile")
+        options.add_argument(os.path.abspath(profile))
+    else:
+        options.add_argument("--user-data-dir=" + os.path.abspath(profile))
+    return True
+
+def profile_directory(args, nr = None):
+    """
+    Returns the directory of the persisted profile of the browser selected on the command line, or None if browsers
+    start with a fresh profile. Concurrent browsers cannot share a profile, so each worker process or session of the
+    async backend has its own
+
+    args: the parsed command line arguments
+    nr (integer): number of the worker or session, or None if there is only one browser at a time
+    """
+    if args.cache_mode == "cold":
+        return None
+    return os.path.join(args.profile_dir, args.browser if nr is None else f"{args.browser}_{nr}")
+
+def profile_is_warm(profile):
+    """
+    Returns whether the given profile directory has been used by a browser before, i.e., whether it may have a warm cache
+    """
+    return profile is not None and os.path.isdir(profile) and len(os.listdir(profile)) > 0
+
+def session_settings(browser_name, headless, window_size, block_fonts, network_log, network_profile):
+    """
+    Returns the settings to apply to a browser session once it has started, as a list of driver method names with
+    their arguments. Both startup() and the async backend apply them, so that both start the same browser
+
+    window_size: tuple of width and height of the browser window, or None to maximize the window (or
+        1920x1080 when headless)
+    """
+    settings = []
+    if window_size is None and headless:
+        window_size = (1920, 1080)
+    if window_size is None:
+        settings.append(("maximize_window",))
+    else:
+        settings.append(("set_window_size", *window_size))
+    if block_fonts and browser_name in [ "chrome", "edge" ]:
+        settings.append(("execute_cdp_cmd", "Network.enable", {}))
+        settings.append(("execute_cdp_cmd", "Network.setBlockedURLs", { "urls": font_url_patterns }))
+    if network_log:
+        settings.append(("execute_cdp_cmd", "Performance.enable", {}))
+    if network_profile is not None and browser_name in chromium_vendor_prefixes:
+        settings.append(("execute_cdp_cmd", "Network.enable", {}))
+        settings.append(("execute_cdp_cmd", "Network.emulateNetworkConditions", network_conditions(network_profile)))
+    return settings
+
+def startup(browser_name = "firefox", headless = False, window_size = None, page_load_strategy = "normal", block_images = False, block_fonts = False, network_log = False, profile = None, network_profile = None):
     """
     Starts a browser and returns the associated webdriver instance
 
     browser_name (string): name of the browser. Must be one of the keys of the "browsers" dict
-
-    Returns: webdriver instance
+    headless (boolean): whether to run the browser without a window
+    window_size: tuple of width and height of the browser window, or None to maximize the window (or
+        1920x1080 if headless)
+    page_load_strategy (string): one of the values in page_load_strategies
+    block_images (boolean): whether to block images
+    block_fonts (boolean): whether to block web fonts
+    network_log (boolean): whether to log the network breakdown of each navigation step
+    profile (string): directory of the persisted profile to use, or None to start with a fresh profile
+    network_profile (string): network profile to emulate (one of the keys of throttleproxy.network_profiles), or None
+
+    Returns: webdriver instance. Its attribute cache_warm tells whether the browser may have cached the questionnaire
     """
-    log("Starting browser: " + browser_name)    
+    log_context["browser"] = browser_name
+    log("Starting browser: " + browser_name)
     try:
         init = browsers[browser_name]
     except KeyError: 
         log("Unknown browser: " + browser_name)
         exit(1)
-    driver = init()
-    driver.maximize_window()
+    options = browser_options[browser_name](headless, page_load_strategy, block_images, block_fonts)
+    network_log = network_log and enable_network_log(options, browser_name)
+    cache_warm = profile_is_warm(profile)
+    if profile is not None and not use_profile(options, browser_name, profile):
+        cache_warm = False
+    proxy = None
+    if network_profile is not None and browser_name not in chromium_vendor_prefixes:
+        proxy = use_throttling_proxy(options, browser_name, network_profile)
+    driver = instrument(init(options = options))
+    driver.network_log = network_log
+    driver.cache_warm = cache_warm
+    driver.throttling_proxy = proxy
+    for command, *command_args in session_settings(browser_name, headless, window_size, block_fonts, network_log, network_profile):
+        getattr(driver, command)(*command_args)
     log("Startup complete")
     return driver
 
+def start_browser(args):
+    """
+    Starts the browser selected on the command line, with the browser settings from the command line
+
+    args: the parsed command line arguments
+
+    Returns: webdriver instance
+    """
+    return startup(args.browser, args.headless, args.window_size, args.page_load_strategy, args.block_images, args.block_fonts,
+                   args.network_log, profile_directory(args, log_context.get("worker")), args.network_profile)
+
+def log_cache_state(driver):
+    """
+    Logs whether the cache of the browser is cold or warm at the start of a run, after the browser has been started
+    or reset. From then on, the browser has loaded the questionnaire, so its cache counts as warm for later runs
+
+    driver: webdriver instance
+    """
+    log("Cache state: " + ("warm" if driver.cache_warm else "cold"))
+    driver.cache_warm = True
+
 def stop(driver):
     """
     Stops the browser associated with driver
@@ -265,9 +1394,68 @@ def stop(driver):
     driver: webdriver instance
     """
     log("Closing browser")
-    driver.close()
+    try:
+        driver.close()
+    finally:
+        if driver.throttling_proxy is not None:
+            driver.throttling_proxy.shutdown()
     log("Browser closed")
 
+def recycle_session(driver):
+    """
+    Closes the browser after a step timeout, so that the next run starts with a new browser. The browser may be in
+    a bad state, so errors while closing it are ignored
+
+    driver: webdriver instance
+    """
+    log("Recycling browser session")
+    try:
+        stop(driver)
+    except WebDriverException:
+        pass
+
+def reset_session(driver):
+    """
+    Resets the browser associated with driver to the state of a new browser session, as far as the questionnaire is
+    concerned: cookies, local storage and session storage are cleared, both for the current page and for the login page.
+    Note that the browser cache is kept
+
+    driver: webdriver instance
+    """
+    log("Resetting session")
+    for url in [ None, base_url ]:
+        if url is not None:
+            driver.get(url)
+        driver.delete_all_cookies()
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except WebDriverException:
+            pass
+    log("Session reset complete")
+
+def take_snapshot(driver):
+    """
+    Takes a snapshot of the state of the current page (see js_page_snapshot), and stores it in page_state
+
+    driver: webdriver instance
+
+    returns: the snapshot, as a dict
+    """
+    global page_state
+
+    page_state = driver.execute_script(js_page_snapshot, css_menu_items, css_menu_active_font, active_font_classname, css_next_page_button)
+    return page_state
+
+def log_active_item(driver):
+    """
+    Takes a snapshot of the page that has just been loaded, and logs the active item
+
+    driver: webdriver instance
+    """
+    take_snapshot(driver)
+    log_context["item"] = " / ".join(page_state["active"])
+    log("Active item: " + log_context["item"])
+
 def navigate_page(driver, url):
     """
     Navigates the browser associated with driver to the given url
@@ -275,23 +1463,28 @@ def navigate_page(driver, url):
     driver: webdriver instance
     url (string): URL to navigate to
     """
+    global page_state
+
     log("Navigating to page: " + url)
     driver.get(url)
+    page_state = None
 
 def login(driver, uname, pwd):
     """
     Enters login details in the current page of the browser associated with driver
     """
+    log_context["username"] = uname
+    log_context.pop("item", None)
     log("Filling in username: " + uname)
     driver.find_element_by_css_selector(css_username_field).send_keys(uname)
     log("Filling in password: " + pwd)
     driver.find_element_by_css_selector(css_password_field).send_keys(pwd)
+    begin_step(driver)
     log("Pressing login button")
     click_and_wait(driver, driver.find_element_by_css_selector(css_login_button))
     log("Login complete")
-    active_elements = driver.find_elements_by_css_selector(css_menu_active_font)
-    active_texts = [ element.text for element in active_elements ]
-    log("Active item: " + " / ".join(active_texts))
+    end_step(driver)
+    log_active_item(driver)
 
 def navigate_first_menu_item(driver):
     """
@@ -300,12 +1493,12 @@ def navigate_first_menu_item(driver):
 
     driver: webdriver instance
     """
+    begin_step(driver, 0)
     log("Navigating to first menu item")
     click_and_wait(driver, driver.find_element_by_css_selector(css_menu_items))
     log("Navigation complete")
-    active_elements = driver.find_elements_by_css_selector(css_menu_active_font)
-    active_texts = [ element.text for element in active_elements ]
-    log("Active item: " + " / ".join(active_texts))
+    end_step(driver)
+    log_active_item(driver)
 
 def navigate_next(driver):
     """
@@ -314,6 +1507,7 @@ def navigate_next(driver):
 
     driver: webdriver instance. 
     """
+    begin_step(driver)
     log("Navigating to next menu item")
     
     driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
@@ -322,6 +1516,9 @@ def navigate_next(driver):
     except:
         pass
 
+    if page_state is not None and not page_state["has_next"]:
+        log("No next item found")
+        return False
     try:
         element = driver.find_element_by_css_selector(css_next_page_button)
     except:
@@ -329,23 +1526,22 @@ def navigate_next(driver):
         return False
     click_and_wait(driver, element)
     log("Navigation complete")
-    active_elements = driver.find_elements_by_css_selector(css_menu_active_font)
-    active_texts = [ element.text for element in active_elements ]
-    log("Active item: " + " / ".join(active_texts))
+    end_step(driver)
+    log_active_item(driver)
     return True
 
 def get_menu_length(driver):
     """
     Finds the number of items in the sidebar menu of the questionnaire. This is assumed to be
-    the active document in the browser associated with driver
+    the active document in the browser associated with driver. The number is taken from the snapshot
+    of the page taken after the last navigation
 
     driver: webdriver instance
 
     returns: the number of menu items found
     """
     log("Getting number of menu items")
-    elements = driver.find_elements_by_css_selector(css_menu_items)
-    n_elements = len(elements)
+    n_elements = take_snapshot(driver)["menu_length"] if page_state is None else page_state["menu_length"]
     log ("Found {:d} menu items".format(n_elements))
     return n_elements
     
@@ -357,77 +1553,1040 @@ def navigate_nth_menu_item(driver, i):
     driver: webdriver instance
     i (integer): number of the menu item that is navigated to. This is zero-based, i.e., 0 is the first menu item
     """
+    begin_step(driver, i)
     log("Navigating to menu item " + str(i))
     elements = driver.find_elements_by_css_selector(css_menu_items)
     click_and_wait(driver, elements[i])
     log("Navigation complete")
-    active_elements = driver.find_elements_by_css_selector(css_menu_active_font)
-    active_texts = [ element.text for element in active_elements ]
-    log("Active item: " + " / ".join(active_texts))
+    end_step(driver)
+    log_active_item(driver)
 
 def is_first_item(driver):
     """
     Returns whether the current page of the questionnaire is the first page. It does so by checking if the 
     first item of the menu is the active one. This check is done via the font used: Font12 is the font
-    used for the active menu item
+    used for the active menu item. The check is done on the snapshot of the page taken after the last navigation
 
     driver: webdriver instance
 
     returns: True if the current page is the first page of the questionnaire; False otherwise
     """
-    element = driver.find_element_by_css_selector(css_menu_items)
-    attr = element.get_attribute("class")
-    return active_font_classname in attr
-
-if __name__ == "__main__":
+    if page_state is None:
+        take_snapshot(driver)
+    return page_state["first_active"]
 
-    args = parse_arguments()
-    
-    config_filename = "config-" + args.config + ".py"
-#    with open(config_filename, "r") as f:
-#        config = json.load(f)
+def log_settings(args):
+    """
+    Logs the settings that determine how the measurements were taken, and applies those settings that are not
+    passed to the individual functions
 
-    log_init(args.output_filename)
-    exec(open(config_filename).read())
+    args: the parsed command line arguments
+    """
+    global step_timeout
 
-    log("Clockbot start")
+    if args.campaign is not None:
+        log("Campaign: " + args.campaign)
+    log("Configuration: " + args.config)
     log("Traversal method: " + args.traversal_method)
+    log("Session mode: " + args.session_mode)
+    log("Cache mode: " + args.cache_mode)
+    log("Browser settings",
+        headless = args.headless,
+        window_size = "{:d}x{:d}".format(*args.window_size) if args.window_size else None,
+        page_load_strategy = args.page_load_strategy,
+        block_images = args.block_images,
+        block_fonts = args.block_fonts,
+        network_log = args.network_log)
+    if args.network_profile is not None:
+        log("Network profile: " + args.network_profile)
+        log("Network conditions", **throttleproxy.network_profiles[args.network_profile])
+    step_timeout = args.step_timeout if args.step_timeout > 0 else None
+    if step_timeout is not None:
+        log("Step deadline: {:g} s".format(step_timeout))
+    set_wait_mode(args.wait_mode)
+
+def run(args, cred, run_nr, driver = None, warm_up = False):
+    """
+    Performs a single run: logs in with the given credentials, and traverses the questionnaire. In session mode
+    "fresh", a new browser is started for the run, and closed afterwards. In session mode "reuse", the given
+    browser is reset and used for the run, and kept open afterwards
 
-    creds = read_credentials(args.cred_filename)
+    args: the parsed command line arguments
+    cred: record from the credentials file, containing at least "Gebruikersnaam" and "Wachtwoord"
+    run_nr (integer): number of the run for this credential, starting at 1
+    driver: webdriver instance of the browser to reuse, or None to start a new browser
+    warm_up (boolean): whether this is a warm-up run, which the analyzer discards
 
-    for cred in creds:
-        for count in range(args.n_runs):
-            driver = startup(args.browser)
+    A run in which a step exceeds its deadline ends with that step, and its browser is closed; see recycle_session
+
+    Returns: the webdriver instance to use for the next run, or None if a new browser must be started
+    """
+    log_context["run"] = run_nr
+    log("Run number: " + str(run_nr))
+    if warm_up:
+        log("Warm-up run")
+    if driver is None:
+        driver = start_browser(args)
+    else:
+        reset_session(driver)
+    try:
+        log_cache_state(driver)
+        navigate_page(driver, base_url)
+        login(driver, cred["Gebruikersnaam"], cred["Wachtwoord"])
+        if not is_first_item(driver):
+            # We want to process the questionnaire from the 1st page to the last. However,
+            # the system stores the last page visited, so after logging in we may not be on
+            # the first page. If this is the case we navigate to the first page and
+            # restart (or reset) the browser, to ensure we start at the first page in a fresh
+            # browser environment
+            log("Not on first page.")
+            navigate_first_menu_item(driver)
+            if args.session_mode == "reuse":
+                reset_session(driver)
+            else:
+                stop(driver)
+                driver = start_browser(args)
+            log_cache_state(driver)
             navigate_page(driver, base_url)
             login(driver, cred["Gebruikersnaam"], cred["Wachtwoord"])
-            if not is_first_item(driver):
-                # We want to process the questionnaire from the 1st page to the last. However,
-                # the system stores the last page visited, so after logging in we may not be on
-                # the first page. If this is the case we navigate to the first page and
-                # restart the browser, to ensure we start at the first page in a fresh browser
-                # environment
-                log("Not on first page.")
+
+        if args.traversal_method == "linear":
+            while navigate_next(driver):
+                pass
+
+        elif args.traversal_method == "index":
+            n = get_menu_length(driver)
+            for i in range(1, n):
+                navigate_nth_menu_item(driver, i)
                 navigate_first_menu_item(driver)
+
+        elif args.traversal_method == "graph":
+            # The number of menu items is taken from the snapshot after every navigation, so that menu items that
+            # become enabled on the way are visited as well
+            i = 1
+            while i < get_menu_length(driver):
+                navigate_nth_menu_item(driver, i)
+                i += 1
+    
+        else:
+            log("Unknown traversal method " + args.traversal_method)
+            log("Quitting")
+            exit(1)
+    except StepTimeout as e:
+        # The page did not load in time. The browser is closed, because it may still be busy with the page, and
+        # the run ends here; the analyzer records the step as a censored load time of the target menu item
+        log("Step timeout: {:.3f} s".format(e.elapsed), target = step_target)
+        fail_step(str(e))
+        try:
+            end_step(driver)
+        except WebDriverException:
+            pass
+        recycle_session(driver)
+        log_sync()
+        return None
+
+    if args.session_mode == "reuse":
+        log("Run complete")
+        log_sync()
+        return driver
+
+    stop(driver)
+    log_sync()
+    return None
+
+def run_all(args, creds, done = frozenset()):
+    """
+    Performs all runs for each of the given credentials. If there is a campaign state file, every completed run is
+    recorded in it, after its log events have been synced to disk
+
+    args: the parsed command line arguments
+    creds: iterable of records from the credentials file
+    done: set of (username, run number) tuples of runs to skip, because they were completed before
+    """
+    filename = state_filename(args)
+    driver = None
+    warmed_up = not args.warm_up
+    for cred in creds:
+        if not warmed_up:
+            driver = warm_up(args, cred, driver)
+            warmed_up = True
+        for count in range(args.n_runs):
+            run_nr = count + 1
+            if (cred["Gebruikersnaam"], run_nr) in done:
+                log(f"Skipping run {run_nr} of {cred['Gebruikersnaam']}: completed before")
+                continue
+            driver = run(args, cred, run_nr, driver)
+            if filename is not None:
+                log_sync(wait = True)
+                mark_run_complete(filename, cred["Gebruikersnaam"], run_nr)
+    if driver is not None:
+        stop(driver)
+
+def warm_up(args, cred, driver = None):
+    """
+    Does a warm-up run, which is not measured, with the given credentials: run number 0. See run()
+
+    Returns: the webdriver instance to use for the next run, or None if a new browser must be started
+    """
+    return run(args, cred, 0, driver, warm_up = True)
+
+def median_half_width(sorted_values, z = 1.96):
+    """
+    Returns the half width of the distribution-free confidence interval of the median: the interval between the order
+    statistics whose ranks are z standard deviations of the binomial distribution away from the middle. With z = 1.96,
+    the confidence level is 95%. Infinite if there are too few values for such an interval
+
+    sorted_values: list of values, in ascending order
+    """
+    n = len(sorted_values)
+    low = math.floor((n - z * math.sqrt(n)) / 2)
+    high = n - 1 - low
+    if low < 0:
+        return math.inf
+    return (sorted_values[high] - sorted_values[low]) / 2
+
+class LiveLoadTimes(analyzer.ClockbotLogMiner):
+    """
+    Log miner that extracts the load times from the log lines while they are written (see LogWriter.listeners), with
+    the same rules as the analyzer, and passes them to a callback as a list of tuples, one list per run. Each tuple
+    has the values of the given columns of the _timedata.csv file, followed by the load time. Censored load times,
+    of steps that exceeded their deadline, are left out, because they belong to no page
+    """
+    def __init__(self, callback, columns = ["gebruikersnaam", "item"]):
+        super().__init__(None)
+        self.callback = callback
+        self.session_mode = "fresh"
+        self.config = ""
+        self.columns = [ self.timedata_columns.index(column) for column in columns ]
+        self.load_time = self.timedata_columns.index("laadtijd")
+        self.censored = self.timedata_columns.index("gecensureerd")
+
+    def write_rows(self, rows):
+        self.callback([ tuple(row[i] for i in self.columns) + (float(row[self.load_time].replace(",", ".")),) for row in rows if not row[self.censored] ])
+
+class AdaptiveScheduler:
+    """
+    Chooses the runs of an adaptive campaign (--precision). The load times of each page are kept sorted as they come
+    in, to estimate the confidence interval of its median (see median_half_width). A page is imprecise as long as it
+    has fewer than min_samples load times, or its interval is wider than the target. Every credential is run once,
+    to find the pages its traversal covers; after that, the next run goes to the credential that covers the most
+    imprecise pages, and among those to the one with the fewest runs. A credential is never run in two sessions at
+    the same time. The campaign ends when all pages are precise, or when the run budget is used up
+
+    Load times are added by the log writer thread, runs are chosen by the main thread, so all state is guarded by a lock
+    """
+    def __init__(self, creds, precision, budget, min_samples, done = frozenset()):
+        """
+        creds: list of records from the credentials file
+        precision (float): target half width of the confidence interval of the median, in seconds
+        budget (integer): maximum number of runs
+        min_samples (integer): minimum number of load times of each page
+        done: set of (username, run number) tuples of runs that were completed before
+        """
+        self.creds = { cred["Gebruikersnaam"]: cred for cred in creds }
+        self.precision = precision
+        self.budget = budget
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.paths = { username: set() for username in self.creds }
+        self.n_runs = { username: max([ run_nr for user, run_nr in done if user == username ], default = 0) for username in self.creds }
+        # Runs completed before count towards the budget
+        self.started = len(done)
+        self.busy = set()
+
+    def add(self, rows):
+        """
+        Adds the load times of a run: list of (username, item, load time) tuples
+        """
+        with self.lock:
+            for username, item, load_time in rows:
+                bisect.insort(self.samples.setdefault(item, []), load_time)
+                self.paths.setdefault(username, set()).add(item)
+
+    def is_precise(self, item):
+        values = self.samples[item]
+        return len(values) >= self.min_samples and median_half_width(values) <= self.precision
+
+    def next_run(self):
+        """
+        Returns: tuple of the credentials record and the run number of the next run, or None if no run is needed
+        at the moment. The run counts as started until complete() is called
+        """
+        with self.lock:
+            if self.started >= self.budget:
+                return None
+            imprecise = { item for item in self.samples if not self.is_precise(item) }
+            best = None
+            for username in self.creds:
+                if username in self.busy:
+                    continue
+                score = math.inf if not self.paths[username] else len(self.paths[username] & imprecise)
+                if score > 0 and (best is None or (score, -self.n_runs[username]) > best[0]):
+                    best = ((score, -self.n_runs[username]), username)
+            if best is None:
+                return None
+            username = best[1]
+            self.busy.add(username)
+            self.started += 1
+            self.n_runs[username] += 1
+            return self.creds[username], self.n_runs[username]
+
+    def complete(self, username):
+        """
+        Marks the run of the given credential as complete. Its load times must have been added before
+        """
+        with self.lock:
+            self.busy.discard(username)
+
+    def log_status(self):
+        """
+        Logs the number of load times and the confidence interval of the median of every page, and whether the
+        campaign ended because all pages are precise or because the budget was used up
+        """
+        with self.lock:
+            pages = { item: [ len(values), round(1000 * median_half_width(values), 3) if median_half_width(values) < math.inf else None ]
+                      for item, values in sorted(self.samples.items()) }
+            n_imprecise = sum(1 for item in self.samples if not self.is_precise(item))
+        log("Precision per page", pages = pages)
+        if n_imprecise > 0:
+            log(f"Run budget used up: {n_imprecise} page(s) not precise enough after {self.started} runs")
+        else:
+            log(f"All pages precise after {self.started} runs")
+
+def adaptive_scheduler(args, creds, done):
+    """
+    Creates the scheduler of an adaptive campaign. When a campaign is resumed, the load times in the logs of the
+    interrupted campaign are added, so that they count towards the precision
+
+    Returns: AdaptiveScheduler instance
+    """
+    scheduler = AdaptiveScheduler(creds, args.precision / 1000, args.budget, args.min_samples, done)
+    if args.resume:
+        filenames = [ args.output_filename ] + [ worker_log_filename(args.output_filename, i + 1) for i in range(args.n_workers) ]
+        for filename in filenames:
+            if os.path.exists(filename):
+                LiveLoadTimes(scheduler.add).process_file(filename)
+    return scheduler
+
+def run_adaptive(args, creds, done = frozenset()):
+    """
+    Performs the runs of an adaptive campaign in this process; see AdaptiveScheduler. After each run, the scheduler
+    gets the load times of the run from the log writer, before it chooses the next run
+
+    args: the parsed command line arguments
+    creds: list of records from the credentials file
+    done: set of (username, run number) tuples of runs that were completed before
+    """
+    filename = state_filename(args)
+    scheduler = adaptive_scheduler(args, creds, done)
+    log_writer.listeners.append(LiveLoadTimes(scheduler.add).process_line)
+    driver = None
+    warmed_up = not args.warm_up
+    while True:
+        job = scheduler.next_run()
+        if job is None:
+            break
+        cred, run_nr = job
+        if not warmed_up:
+            driver = warm_up(args, cred, driver)
+            warmed_up = True
+        driver = run(args, cred, run_nr, driver)
+        log_sync(wait = True)
+        if filename is not None:
+            mark_run_complete(filename, cred["Gebruikersnaam"], run_nr)
+        scheduler.complete(cred["Gebruikersnaam"])
+    if driver is not None:
+        stop(driver)
+    scheduler.log_status()
+
+def run_adaptive_workers(args, creds, done = frozenset()):
+    """
+    Performs the runs of an adaptive campaign in args.n_workers worker processes. The scheduler runs in this process:
+    it hands out one run at a time to each worker, through a job queue per worker, and the workers send back the load
+    times of every run, followed by a message that the run is complete. The run of a worker that stops before it
+    completes its run, e.g. because its browser crashed, is released, and the other workers carry on
+
+    args: the parsed command line arguments
+    creds: list of records from the credentials file
+    done: set of (username, run number) tuples of runs that were completed before
+    """
+    scheduler = adaptive_scheduler(args, creds, done)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    n_workers = min(args.n_workers, len(creds))
+    jobs = [ context.Queue() for _ in range(n_workers) ]
+
+    follow_worker_logs(args, n_workers)
+    log(f"Starting {n_workers} workers")
+    workers = [ context.Process(target = worker, args = (i + 1, args, jobs[i], done, results)) for i in range(n_workers) ]
+    for p in workers:
+        p.start()
+
+    # User name of the run in progress per worker
+    assigned = {}
+    while True:
+        for i, p in enumerate(workers):
+            if i in assigned and not p.is_alive():
+                log(f"Worker {i + 1} stopped during a run of {assigned[i]}")
+                scheduler.complete(assigned.pop(i))
+        for i, p in enumerate(workers):
+            if i in assigned or not p.is_alive():
+                continue
+            job = scheduler.next_run()
+            if job is None:
+                break
+            jobs[i].put(job)
+            assigned[i] = job[0]["Gebruikersnaam"]
+        if not assigned:
+            if not any(p.is_alive() for p in workers):
+                log("All workers stopped before the campaign was complete")
+            break
+        try:
+            kind, data = results.get(timeout = 1)
+        except queue.Empty:
+            continue
+        if kind == "rows":
+            scheduler.add(data)
+        else:
+            scheduler.complete(data)
+            assigned = { i: username for i, username in assigned.items() if username != data }
+
+    for i in range(n_workers):
+        jobs[i].put(None)
+    for p in workers:
+        p.join()
+    log("All workers finished")
+    scheduler.log_status()
+
+class AnomalyDetector:
+    """
+    Online detector of slowdowns, per configuration and page. The logarithms of the load times of each page are
+    smoothed by an exponentially weighted moving average (EWMA), which is compared with the baseline of the page: the
+    mean and standard deviation of the logarithm of its load time. An alert is raised when the EWMA exceeds the
+    baseline by more than threshold standard deviations of the EWMA, i.e. EWMA control chart limits, and cleared when
+    it drops below that limit again.
+
+    The baseline of a page comes from a baseline file (analyzer.py baseline), written from earlier campaigns. Pages
+    that are not in the file learn their baseline from their first learning_samples load times, and keep following
+    it with a slow EWMA while there is no alert
+
+    Load times are added by the log writer thread, so alerts are logged from that thread
+    """
+    def __init__(self, baseline = {}, smoothing = 0.2, threshold = 3.0, learning_samples = 30, baseline_smoothing = 0.01):
+        """
+        baseline: dict of (configuration, item) to dict with the mean and the standard deviation of the logarithm of
+            the load times, as read from a baseline file by read_baseline
+        smoothing (float): weight of a new load time in the EWMA
+        threshold (float): control limit, in standard deviations of the EWMA
+        learning_samples (integer): number of load times from which a page without a baseline learns its baseline
+        baseline_smoothing (float): weight of a new load time in a learned baseline
+        """
+        self.smoothing = smoothing
+        self.threshold = threshold
+        self.learning_samples = learning_samples
+        self.baseline_smoothing = baseline_smoothing
+        self.pages = {}
+        for key, page in baseline.items():
+            self.pages[key] = { "mean": page["mean_log"], "var": page["sd_log"] ** 2, "n": page["n"], "stored": True,
+                                "ewma": page["mean_log"], "alert": False, "n_alerts": 0, "max_z": -math.inf }
+        self.lock = threading.Lock()
+
+    def add(self, rows):
+        """
+        Adds the load times of a run: list of (configuration, item, load time) tuples
+        """
+        with self.lock:
+            for config, item, load_time in rows:
+                self.add_load_time(config, item, math.log(max(load_time, 0.001)))
+
+    def add_load_time(self, config, item, x):
+        page = self.pages.get((config, item))
+        if page is None:
+            page = self.pages[(config, item)] = { "mean": 0.0, "var": 0.0, "n": 0, "stored": False,
+                                                  "ewma": 0.0, "alert": False, "n_alerts": 0, "max_z": -math.inf }
+        if not page["stored"] and page["n"] < self.learning_samples:
+            # Learning the baseline: running mean and variance (Welford)
+            page["n"] += 1
+            delta = x - page["mean"]
+            page["mean"] += delta / page["n"]
+            page["var"] += (delta * (x - page["mean"]) - page["var"]) / page["n"]
+            page["ewma"] = page["mean"]
+            return
+
+        page["ewma"] = self.smoothing * x + (1 - self.smoothing) * page["ewma"]
+        sd = max(math.sqrt(page["var"]), 0.01) * math.sqrt(self.smoothing / (2 - self.smoothing))
+        z = (page["ewma"] - page["mean"]) / sd
+        page["max_z"] = max(page["max_z"], z)
+        if z > self.threshold and not page["alert"]:
+            page["alert"] = True
+            page["n_alerts"] += 1
+            log("Alert", kind = "slowdown", config = config, page = item, z = round(z, 2),
+                ewma_s = round(math.exp(page["ewma"]), 3), baseline_s = round(math.exp(page["mean"]), 3),
+                limit_s = round(math.exp(page["mean"] + self.threshold * sd), 3))
+        elif z <= self.threshold and page["alert"]:
+            page["alert"] = False
+            log("Alert cleared", config = config, page = item, z = round(z, 2), ewma_s = round(math.exp(page["ewma"]), 3))
+
+        if not page["stored"] and not page["alert"]:
+            delta = x - page["mean"]
+            page["mean"] += self.baseline_smoothing * delta
+            page["var"] = (1 - self.baseline_smoothing) * (page["var"] + self.baseline_smoothing * delta ** 2)
+
+    def log_summary(self):
+        """
+        Logs the number of alerts per page, the pages that are still in alert, and the largest EWMA deviation of each page
+        """
+        with self.lock:
+            pages = [ { "config": config, "page": item, "alerts": page["n_alerts"], "in_alert": page["alert"],
+                        "max_z": None if page["max_z"] == -math.inf else round(page["max_z"], 2) }
+                      for (config, item), page in sorted(self.pages.items()) ]
+        log("Alert summary: {:d} alert(s) on {:d} page(s)".format(sum(page["alerts"] for page in pages), sum(1 for page in pages if page["alerts"] > 0)),
+            pages = pages)
+
+def read_baseline(filename):
+    """
+    Reads a baseline file written by analyzer.py baseline
+
+    Returns: dict of (configuration, item) to dict with n, mean_log and sd_log
+    """
+    with open(filename, "r", encoding = "utf-8") as f_in:
+        return { (page["configuratie"], page["item"]): page for page in json.load(f_in)["pages"] }
+
+# Anomaly detector of this process, with --detect-anomalies or --baseline. None if anomalies are not detected
+anomaly_detector = None
+
+def start_anomaly_detection(args):
+    """
+    Starts detecting slowdowns in the load times of this process, as they are logged; see AnomalyDetector
+
+    args: the parsed command line arguments
+    """
+    global anomaly_detector
+
+    baseline = read_baseline(args.baseline_filename) if args.baseline_filename is not None else {}
+    anomaly_detector = AnomalyDetector(baseline, threshold = args.alert_threshold)
+    # The configuration has usually been logged, and written, before the listener is added
+    miner = LiveLoadTimes(anomaly_detector.add, ["configuratie", "item"])
+    miner.config = args.config
+    log_writer.listeners.append(miner.process_line)
+
+def stop_anomaly_detection():
+    """
+    Logs the summary of the alerts, after all load times have been processed by the anomaly detector
+    """
+    if anomaly_detector is not None:
+        log_sync(wait = True)
+        anomaly_detector.log_summary()
+
+def worker(worker_nr, args, jobs, done, results = None):
+    """
+    Main function of a worker process. The worker writes its own log file, and takes jobs from the job queue
+    until it receives None. Each job is a credentials record, for which the worker performs all runs in turn.
+    All runs of one credential are done by the same worker, because the questionnaire server keeps track of
+    the last page visited per user, and concurrent sessions of the same user would interfere with each other.
+    In adaptive mode, each job is a single run, a tuple of a credentials record and a run number, and the worker
+    sends the load times of each run to the results queue; see run_adaptive_workers
+
+    worker_nr (integer): number of the worker, starting at 1
+    args: the parsed command line arguments
+    jobs: multiprocessing queue with credentials records; in adaptive mode, the queue of this worker only
+    done: set of (username, run number) tuples of runs to skip, because they were completed before
+    results: multiprocessing queue for the load times of each run in adaptive mode, or None
+    """
+    load_config(args.config)
+    log_init(worker_log_filename(args.output_filename, worker_nr), args.log_format, args.fsync_policy, args.resume)
+    log_context["worker"] = worker_nr
+    artifacts_init(args)
+
+    try:
+        log("Clockbot start")
+        log("Worker: " + str(worker_nr))
+        log_settings(args)
+        if args.detect_anomalies or args.baseline_filename is not None:
+            start_anomaly_detection(args)
+
+        if results is None:
+            run_all(args, iter(jobs.get, None), done)
+        else:
+            filename = state_filename(args)
+            log_writer.listeners.append(LiveLoadTimes(lambda rows: results.put(("rows", rows))).process_line)
+            driver = None
+            warmed_up = not args.warm_up
+            for cred, run_nr in iter(jobs.get, None):
+                if not warmed_up:
+                    driver = warm_up(args, cred, driver)
+                    warmed_up = True
+                driver = run(args, cred, run_nr, driver)
+                log_sync(wait = True)
+                if filename is not None:
+                    mark_run_complete(filename, cred["Gebruikersnaam"], run_nr)
+                results.put(("complete", cred["Gebruikersnaam"]))
+            if driver is not None:
                 stop(driver)
-                driver = startup(args.browser)
-                navigate_page(driver, base_url)
-                login(driver, cred["Gebruikersnaam"], cred["Wachtwoord"])
+
+        stop_anomaly_detection()
+        log("End")
+    finally:
+        artifacts_close()
+        log_close()
+
+# Page-load detection modes of the async backend, which always detects page loads with an event handler in the page,
+# per click_and_wait function that can be chosen in the configuration
+wait_function_modes = {
+    click_and_wait_contents: "contents",
+    click_and_wait_ie: "ie",
+    click_and_wait_splash: "splash",
+    click_and_wait_contents_event: "contents",
+    click_and_wait_ie_event: "ie",
+    click_and_wait_splash_event: "splash"
+}
+
+class AsyncRun:
+    """
+    One browser session of the async backend, with the same steps as the functions for the selenium backend above.
+    Those keep the state of the session in global variables (page_state, page_timing, log_context), which cannot
+    be shared by concurrent sessions; here the state is kept per session. Every log event carries the number of the
+    session, so that the analyzer can tell the interleaved events of concurrent sessions apart
+    """
+    def __init__(self, client, args, session_nr):
+        self.client = client
+        self.args = args
+        self.fields = { "session": session_nr }
+        self.session = None
+        self.page_state = None
+        self.page_timing = None
+        self.stats = CommandStats()
+        self.network_log = False
+        self.step_metrics = None
+        self.cache_warm = False
+        self.failure = None
+        self.target = None
+        self.step_start = None
+        self.throttling_proxy = None
+
+    def log(self, msg, **fields):
+        log(msg, **self.fields, **fields)
+
+    async def startup(self):
+        args = self.args
+        self.fields["browser"] = args.browser
+        self.log("Starting browser: " + args.browser)
+        options = browser_options[args.browser](args.headless, args.page_load_strategy, args.block_images, args.block_fonts)
+        self.network_log = args.network_log and enable_network_log(options, args.browser)
+        profile = profile_directory(args, self.fields["session"])
+        self.cache_warm = profile_is_warm(profile)
+        if profile is not None and not use_profile(options, args.browser, profile):
+            self.cache_warm = False
+        emulate = args.network_profile is not None and args.browser in chromium_vendor_prefixes
+        if args.network_profile is not None and not emulate:
+            self.throttling_proxy = use_throttling_proxy(options, args.browser, args.network_profile)
+        self.session = await self.client.new_session(options.to_capabilities(), self.stats.add)
+        for command, *command_args in session_settings(args.browser, args.headless, args.window_size, args.block_fonts,
+                                                       self.network_log, args.network_profile):
+            await getattr(self, command)(*command_args)
+        self.log("Startup complete")
+
+    async def maximize_window(self):
+        await self.session.maximize_window()
+
+    async def set_window_size(self, width, height):
+        await self.session.set_window_rect(width, height)
+
+    async def execute_cdp_cmd(self, cmd, params = {}):
+        return await self.session.execute_cdp_cmd(cmd, params, chromium_vendor_prefixes[self.args.browser])
+
+    async def stop(self):
+        self.log("Closing browser")
+        try:
+            await self.session.delete()
+        finally:
+            if self.throttling_proxy is not None:
+                self.throttling_proxy.shutdown()
+                self.throttling_proxy = None
+        self.session = None
+        self.log("Browser closed")
+
+    async def reset_session(self):
+        self.log("Resetting session")
+        for url in [ None, base_url ]:
+            if url is not None:
+                await self.session.get(url)
+            await self.session.delete_all_cookies()
+            try:
+                await self.session.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except aiowebdriver.WebDriverError:
+                pass
+        self.log("Session reset complete")
+
+    def log_cache_state(self):
+        self.log("Cache state: " + ("warm" if self.cache_warm else "cold"))
+        self.cache_warm = True
+
+    async def navigate_page(self, url):
+        self.log("Navigating to page: " + url)
+        await self.session.get(url)
+        self.page_state = None
+
+    async def log_active_item(self):
+        self.page_state = await self.session.execute_script(js_page_snapshot, css_menu_items, css_menu_active_font, active_font_classname, css_next_page_button)
+        self.fields["item"] = " / ".join(self.page_state["active"])
+        self.log("Active item: " + self.fields["item"])
+
+    async def click_and_wait(self, element):
+        """
+        Clicks the given element and waits for the page to load; see click_and_wait_event
+        """
+        mode = wait_function_modes[click_and_wait]
+        selector = css_wait_full_page if mode != "splash" else None
+        self.page_timing = None
+
+        try:
+            await self.session.execute_script(js_wait_install, mode, selector)
+        except aiowebdriver.WebDriverError:
+            pass
+
+        try:
+            await element.click()
+        except aiowebdriver.WebDriverError as e:
+            if e.error not in [ "element click intercepted", "element not interactable" ]:
+                raise
+            self.log(f"{e}: Element cannot be clicked")
+            self.failure = "Element cannot be clicked: " + str(e)
+            return
+
+        while True:
+            try:
+                # A wait that outlives the deadline of the step is cancelled by step(), but the script would keep
+                # the browser busy until it times out
+                await self.session.set_script_timeout(script_wait_timeout(self.step_start))
+                self.page_timing = await self.session.execute_async_script(js_wait_done, mode, selector)
+                break
+            except aiowebdriver.WebDriverError as e:
+                # The script times out while the page is loading, or fails when the document is unloaded
+                if e.error not in [ "script timeout", "javascript error" ]:
+                    raise
+
+    async def step(self, start_message, end_message, find_element, target = None):
+        """
+        Performs a navigation step: logs its start, clicks the element returned by the coroutine function
+        find_element, waits for the page to load, and logs the end of the step, its details and the new active item.
+        Raises StepTimeout if the page has not loaded before the deadline of the step
+
+        target (integer): number of the menu item that the step navigates to, or None if it is not a menu item
+        """
+        if self.network_log:
+            await self.session.get_log("performance")
+            self.step_metrics = performance_metrics(await self.execute_cdp_cmd("Performance.getMetrics"))
+        self.failure = None
+        self.target = target
+        self.stats.reset()
+        self.step_start = monotonic()
+        self.log(start_message)
+        try:
+            await asyncio.wait_for(self.click_and_wait(await find_element()), step_timeout)
+        except asyncio.TimeoutError:
+            raise StepTimeout(monotonic() - self.step_start)
+        self.log(end_message)
+        log_step_details(self.stats, self.page_timing, **self.fields)
+        if self.network_log:
+            self.log("Network breakdown", **network_breakdown(await self.session.get_log("performance"), self.step_metrics,
+                                                              performance_metrics(await self.execute_cdp_cmd("Performance.getMetrics"))))
+        if self.failure is not None:
+            await self.capture_failure(self.failure)
+            self.failure = None
+        await self.log_active_item()
+
+    async def capture_failure(self, reason):
+        """
+        Captures the failure artifacts of the current step; see capture_failure(). Only the log events of this
+        session are saved
+        """
+        self.log("Capturing failure artifacts: " + reason)
+        if artifact_writer is None:
+            return
+        try:
+            screenshot = await self.session.screenshot()
+        except aiowebdriver.WebDriverError:
+            screenshot = None
+        try:
+            page_source = await self.session.page_source()
+        except aiowebdriver.WebDriverError:
+            page_source = None
+        events = [ event for event in recent_events if event[3].get("session") == self.fields["session"] ]
+        artifact_writer.add(reason, screenshot, page_source, events, self.fields)
+
+    async def recycle_session(self, e):
+        """
+        Ends a run after a step timeout; see run()
+        """
+        self.log("Step timeout: {:.3f} s".format(e.elapsed), target = self.target)
+        log_step_details(self.stats, None, **self.fields)
+        await self.capture_failure(str(e))
+        self.log("Recycling browser session")
+        try:
+            await self.stop()
+        except (aiowebdriver.WebDriverError, OSError):
+            self.session = None
+
+    async def login(self, uname, pwd):
+        self.fields["username"] = uname
+        self.fields.pop("item", None)
+        self.log("Filling in username: " + uname)
+        await (await self.session.find_element(css_username_field)).send_keys(uname)
+        self.log("Filling in password: " + pwd)
+        await (await self.session.find_element(css_password_field)).send_keys(pwd)
+        await self.step("Pressing login button", "Login complete", lambda: self.session.find_element(css_login_button))
+
+    async def navigate_first_menu_item(self):
+        await self.step("Navigating to first menu item", "Navigation complete", lambda: self.session.find_element(css_menu_items), 0)
+
+    async def navigate_next(self):
+        if not self.page_state["has_next"]:
+            self.log("Navigating to next menu item")
+            self.log("No next item found")
+            return False
+
+        async def find_next():
+            await self.session.execute_script("window.scrollTo(0, document.body.scrollHeight);"
+                                              "var elt = document.getElementById(arguments[0]); if (elt) elt.scrollTo(0, elt.scrollHeight);",
+                                              globals().get("id_scrollbar_item", ""))
+            return await self.session.find_element(css_next_page_button)
+
+        await self.step("Navigating to next menu item", "Navigation complete", find_next)
+        return True
+
+    async def navigate_nth_menu_item(self, i):
+        async def find_nth():
+            return (await self.session.find_elements(css_menu_items))[i]
+
+        await self.step("Navigating to menu item " + str(i), "Navigation complete", find_nth, i)
+
+    async def run(self, cred, run_nr, warm_up = False):
+        """
+        Performs a single run; see run()
+        """
+        args = self.args
+        self.fields["run"] = run_nr
+        self.log("Run number: " + str(run_nr))
+        if warm_up:
+            self.log("Warm-up run")
+        if self.session is None:
+            await self.startup()
+        else:
+            await self.reset_session()
+        try:
+            self.log_cache_state()
+            await self.navigate_page(base_url)
+            await self.login(cred["Gebruikersnaam"], cred["Wachtwoord"])
+            if not self.page_state["first_active"]:
+                self.log("Not on first page.")
+                await self.navigate_first_menu_item()
+                if args.session_mode == "reuse":
+                    await self.reset_session()
+                else:
+                    await self.stop()
+                    await self.startup()
+                self.log_cache_state()
+                await self.navigate_page(base_url)
+                await self.login(cred["Gebruikersnaam"], cred["Wachtwoord"])
 
             if args.traversal_method == "linear":
-                while navigate_next(driver):
+                while await self.navigate_next():
                     pass
 
             elif args.traversal_method == "index":
-                n = get_menu_length(driver)
+                n = self.page_state["menu_length"]
                 for i in range(1, n):
-                    navigate_nth_menu_item(driver, i)
-                    navigate_first_menu_item(driver)
-            
-            else:
-                log("Unknown traversal method " + args.traversal_method)
-                log("Quitting")
-                exit(1)
+                    await self.navigate_nth_menu_item(i)
+                    await self.navigate_first_menu_item()
+
+            elif args.traversal_method == "graph":
+                i = 1
+                while i < self.page_state["menu_length"]:
+                    await self.navigate_nth_menu_item(i)
+                    i += 1
+        except StepTimeout as e:
+            await self.recycle_session(e)
+            log_sync()
+            return
+
+        if args.session_mode == "reuse":
+            self.log("Run complete")
+        else:
+            await self.stop()
+        log_sync()
+
+async def run_all_async(args, creds, done = frozenset()):
+    """
+    Performs all runs for each of the given credentials with the async backend, in args.n_workers concurrent
+    browser sessions. As with worker processes, all runs of one credential are done by the same session
 
-            stop(driver)
+    args: the parsed command line arguments
+    creds: list of records from the credentials file
+    done: set of (username, run number) tuples of runs to skip, because they were completed before
+    """
+    filename = state_filename(args)
+    client = aiowebdriver.WebDriverClient(args.webdriver_url, max_connections = args.n_workers)
+    jobs = asyncio.Queue()
+    for cred in creds:
+        jobs.put_nowait(cred)
+
+    async def session_worker(session_nr):
+        session = AsyncRun(client, args, session_nr)
+        warmed_up = not args.warm_up
+        while not jobs.empty():
+            cred = jobs.get_nowait()
+            if not warmed_up:
+                await session.run(cred, 0, warm_up = True)
+                warmed_up = True
+            for count in range(args.n_runs):
+                run_nr = count + 1
+                if (cred["Gebruikersnaam"], run_nr) in done:
+                    session.log(f"Skipping run {run_nr} of {cred['Gebruikersnaam']}: completed before")
+                    continue
+                await session.run(cred, run_nr)
+                if filename is not None:
+                    await asyncio.to_thread(log_sync, True)
+                    mark_run_complete(filename, cred["Gebruikersnaam"], run_nr)
+        if session.session is not None:
+            await session.stop()
+
+    # In adaptive mode, the sessions take their runs from the scheduler instead. A session that gets no run waits
+    # until another session completes one, and stops when no run is in progress either
+    if args.precision is not None:
+        scheduler = adaptive_scheduler(args, creds, done)
+        log_writer.listeners.append(LiveLoadTimes(scheduler.add).process_line)
+        completed = asyncio.Condition()
+
+    async def adaptive_session_worker(session_nr):
+        session = AsyncRun(client, args, session_nr)
+        warmed_up = not args.warm_up
+        while True:
+            job = scheduler.next_run()
+            if job is None:
+                if not scheduler.busy:
+                    break
+                async with completed:
+                    await completed.wait()
+                continue
+            cred, run_nr = job
+            try:
+                if not warmed_up:
+                    await session.run(cred, 0, warm_up = True)
+                    warmed_up = True
+                await session.run(cred, run_nr)
+                await asyncio.to_thread(log_sync, True)
+                if filename is not None:
+                    mark_run_complete(filename, cred["Gebruikersnaam"], run_nr)
+            finally:
+                scheduler.complete(cred["Gebruikersnaam"])
+                async with completed:
+                    completed.notify_all()
+        if session.session is not None:
+            await session.stop()
+
+    n_sessions = min(args.n_workers, len(creds))
+    log(f"Starting {n_sessions} sessions")
+    await asyncio.gather(*[ (session_worker if args.precision is None else adaptive_session_worker)(i + 1) for i in range(n_sessions) ])
+    log("All sessions finished")
+    if args.precision is not None:
+        scheduler.log_status()
+    client.close()
+
+async def run_load(args, creds):
+    """
+    Load test: for every step of the load profile in the configuration (load_steps), runs that many simulated
+    respondents concurrently, with the async backend. Each respondent repeats the traversal until the step has
+    lasted load_step_duration seconds; runs in progress at that moment are completed. Respondents are assigned
+    the credentials in turn
 
-    log("End")
+    args: the parsed command line arguments
+    creds: list of records from the credentials file
+    """
+    client = aiowebdriver.WebDriverClient(args.webdriver_url, max_connections = max(load_steps))
+
+    for n_sessions in load_steps:
+        if n_sessions > len(creds):
+            log(f"Warning: {n_sessions} respondents share {len(creds)} credentials")
+        log(f"Load step: {n_sessions}", duration = load_step_duration)
+        deadline = monotonic() + load_step_duration
+
+        async def respondent(session_nr):
+            session = AsyncRun(client, args, session_nr)
+            cred = creds[(session_nr - 1) % len(creds)]
+            run_nr = 0
+            while monotonic() < deadline:
+                run_nr += 1
+                await session.run(cred, run_nr)
+            if session.session is not None:
+                await session.stop()
+
+        await asyncio.gather(*[ respondent(i + 1) for i in range(n_sessions) ])
+        log(f"Load step complete: {n_sessions}")
+
+    client.close()
+
+if __name__ == "__main__":
+
+    args = parse_arguments()
+    
+    log_init(args.output_filename, args.log_format, args.fsync_policy, args.resume)
+    artifacts_init(args)
+    try:
+        load_config(args.config)
+
+        log("Clockbot start")
+        log_settings(args)
+        if args.metrics_port is not None:
+            start_metrics(args)
+        if args.detect_anomalies or args.baseline_filename is not None:
+            start_anomaly_detection(args)
+
+        creds = read_credentials(args.cred_filename)
+
+        # Campaign state: with --resume, skip the runs that were completed before; otherwise start a new campaign
+        done = set()
+        if state_filename(args) is not None and not args.load:
+            if args.resume:
+                done = read_campaign_state(state_filename(args))
+                log(f"Resuming campaign: {len(done)} runs completed before")
+            else:
+                open(state_filename(args), "w").close()
+
+        if args.load:
+            log("Load profile: " + ", ".join(str(n) for n in load_steps), duration = load_step_duration)
+            asyncio.run(run_load(args, creds))
+        elif args.backend == "async":
+            asyncio.run(run_all_async(args, creds, done))
+        elif args.precision is not None and args.n_workers == 1:
+            run_adaptive(args, creds, done)
+        elif args.precision is not None:
+            run_adaptive_workers(args, creds, done)
+        elif args.n_workers == 1:
+            run_all(args, creds, done)
+        else:
+            # Workers are spawned rather than forked (as on Windows), so that they do not inherit the log writer
+            # thread and the log file of the main process
+            context = multiprocessing.get_context("spawn")
+            jobs = context.Queue()
+            for cred in creds:
+                jobs.put(cred)
+            n_workers = min(args.n_workers, len(creds))
+            for _ in range(n_workers):
+                jobs.put(None)
+
+            follow_worker_logs(args, n_workers)
+            log(f"Starting {n_workers} workers")
+            workers = [ context.Process(target = worker, args = (i + 1, args, jobs, done)) for i in range(n_workers) ]
+            for p in workers:
+                p.start()
+            for p in workers:
+                p.join()
+            log("All workers finished")
+
+        stop_anomaly_detection()
+        log("End")
+    finally:
+        artifacts_close()
+        log_close()
@@ -0,0 +1,26 @@
+# selectors for the local test server (testserver.py)
+base_url = "http://127.0.0.1:8000/"
+
+# Logging in
+css_username_field = "input#Username"
+css_password_field = "input#Password"
+css_login_button = "input[value='Inloggen']"
+
+# Wait for page load
+css_wait_full_page = "#ag"
+click_and_wait = click_and_wait_ie
+
+# Deal with menu items
+css_menu_id = "#ak"
+css_menu_items = css_menu_id + " " + "a.enabled"
+active_font_classname = "Font28"
+css_menu_active_font = "." + active_font_classname
+css_menu_active_item = css_menu_id + " " + css_menu_active_font
+
+# Next page button
+css_next_page_button = "#as:not(.display-none)"
+id_scrollbar_item = "e"
+
+# Load test profile (clockbot --load): numbers of concurrent respondents per step, and duration of each step in seconds
+load_steps = [ 1, 5, 10, 25, 50 ]
+load_step_duration = 60
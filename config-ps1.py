@@ -16,3 +16,7 @@ css_menu_active_item = css_menu_id + " " + css_menu_active_font
 
 # Next page button
 css_next_page_button = "#ac"
+
+# Load test profile (clockbot --load): numbers of concurrent respondents per step, and duration of each step in seconds
+load_steps = [ 1, 5, 10, 25, 50 ]
+load_step_duration = 300
@@ -0,0 +1,286 @@
+#
+# Clockbot live metrics
+#
+# (c) 2018 Centraal Bureau voor de Statistiek / Statistics Netherlands
+#
+# While a campaign is in progress, clockbot can serve metrics over HTTP (clockbot --metrics-port): the number of
+# completed runs, the number of open browser sessions, the number of navigations per minute, the number of steps that
+# exceeded their deadline, and percentiles of the
+# load time per page and browser. The metrics are taken from the log lines as they are written, with the same rules
+# as the analyzer. Percentiles are computed over a rolling window, from quantile sketches of fixed size, so that
+# the memory used does not grow with the length of the campaign.
+#
+# /metrics serves the Prometheus text format, /metrics.json the same metrics as JSON
+#
+import json
+import math
+import os
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from time import monotonic, sleep
+
+import analyzer
+
+class QuantileSketch:
+    """
+    Streaming quantile sketch: a histogram with logarithmic buckets, so that every quantile is estimated with at most
+    the given relative error. Values outside [min_value, max_value] are counted in the first or last bucket, so the
+    number of buckets, and the memory used, is fixed
+    """
+    def __init__(self, relative_accuracy = 0.01, min_value = 0.001, max_value = 3600.0):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.offset = math.floor(math.log(min_value, self.gamma))
+        self.counts = [ 0 ] * (math.ceil(math.log(max_value, self.gamma)) - self.offset + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, value):
+        index = math.ceil(math.log(value, self.gamma)) - self.offset if value > 0 else 0
+        self.counts[min(max(index, 0), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q):
+        """
+        Returns the estimated q-quantile (0 <= q <= 1), or NaN if the sketch is empty
+        """
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        total = 0
+        for i, count in enumerate(self.counts):
+            total += count
+            if total > rank:
+                break
+        # The middle of bucket i, which holds the values in (gamma^(i-1), gamma^i], relative to its bounds
+        return 2 * self.gamma ** (i + self.offset) / (self.gamma + 1)
+
+class Metrics:
+    """
+    Metrics of a campaign in progress. Load times are kept in n_windows consecutive windows of window seconds each,
+    with a sketch per page and browser in each window; the oldest window is dropped when a new one starts. The
+    percentiles and the navigation rate are computed over the windows kept. Updated by the log writer thread and
+    log followers, and read by the HTTP server, so all state is guarded by a lock
+    """
+    def __init__(self, window = 600, n_windows = 6, quantiles = [ 0.5, 0.95 ]):
+        self.window = window
+        self.quantiles = quantiles
+        self.lock = threading.Lock()
+        self.windows = deque(maxlen = n_windows)
+        self.start = monotonic()
+        self.runs_completed = 0
+        self.navigations = 0
+        self.active_sessions = 0
+        self.alerts = 0
+        self.timeouts = 0
+
+    def current_window(self):
+        now = monotonic()
+        if not self.windows or now - self.windows[-1]["start"] >= self.window:
+            # A window covers the time since the end of the previous one, so that idle time counts for the rate
+            since = self.windows[-1]["start"] + self.window if self.windows else self.start
+            self.windows.append({ "since": since, "start": now, "navigations": 0, "sketches": {} })
+        return self.windows[-1]
+
+    def add_run(self, rows):
+        """
+        Adds the navigations of a completed run: list of (browser, item, load time, censored) tuples. Censored load
+        times, of steps that exceeded their deadline, count as navigations, but belong to no page
+        """
+        with self.lock:
+            window = self.current_window()
+            for browser, item, load_time, censored in rows:
+                if censored:
+                    continue
+                sketch = window["sketches"].get((browser, item))
+                if sketch is None:
+                    sketch = window["sketches"][(browser, item)] = QuantileSketch()
+                sketch.add(load_time)
+            window["navigations"] += len(rows)
+            self.navigations += len(rows)
+            self.runs_completed += 1
+
+    def session_started(self):
+        with self.lock:
+            self.active_sessions += 1
+
+    def session_ended(self):
+        with self.lock:
+            self.active_sessions = max(0, self.active_sessions - 1)
+
+    def alert_raised(self):
+        with self.lock:
+            self.alerts += 1
+
+    def step_timed_out(self):
+        with self.lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        """
+        Returns: dict with the current metrics
+        """
+        with self.lock:
+            now = monotonic()
+            self.windows = deque([ window for window in self.windows if now - window["start"] < self.window * self.windows.maxlen ], maxlen = self.windows.maxlen)
+            sketches = {}
+            for window in self.windows:
+                for key, sketch in window["sketches"].items():
+                    if key not in sketches:
+                        sketches[key] = QuantileSketch()
+                    sketches[key].merge(sketch)
+            span = self.window * self.windows.maxlen
+            covered = min(now - self.windows[0]["since"], span) if self.windows else 0
+            recent = sum(window["navigations"] for window in self.windows)
+            return {
+                "runs_completed": self.runs_completed,
+                "navigations": self.navigations,
+                "active_sessions": self.active_sessions,
+                "alerts": self.alerts,
+                "step_timeouts": self.timeouts,
+                "navigations_per_minute": 60 * recent / covered if covered > 0 else 0.0,
+                "window_seconds": round(covered, 3),
+                "pages": [ {
+                    "browser": browser,
+                    "item": item,
+                    "count": sketch.count,
+                    "sum": round(sketch.sum, 6),
+                    "quantiles": { str(q): round(sketch.quantile(q), 6) for q in self.quantiles }
+                } for (browser, item), sketch in sorted(sketches.items()) ]
+            }
+
+def prometheus_label(value):
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+def prometheus_text(snapshot):
+    """
+    Formats a snapshot of the metrics in the Prometheus text exposition format
+    """
+    lines = [
+        "# HELP clockbot_runs_completed_total Number of runs completed.",
+        "# TYPE clockbot_runs_completed_total counter",
+        "clockbot_runs_completed_total {:d}".format(snapshot["runs_completed"]),
+        "# HELP clockbot_navigations_total Number of navigations measured.",
+        "# TYPE clockbot_navigations_total counter",
+        "clockbot_navigations_total {:d}".format(snapshot["navigations"]),
+        "# HELP clockbot_active_sessions Number of open browser sessions.",
+        "# TYPE clockbot_active_sessions gauge",
+        "clockbot_active_sessions {:d}".format(snapshot["active_sessions"]),
+        "# HELP clockbot_alerts_total Number of slowdown alerts raised by the anomaly detector.",
+        "# TYPE clockbot_alerts_total counter",
+        "clockbot_alerts_total {:d}".format(snapshot["alerts"]),
+        "# HELP clockbot_step_timeouts_total Number of navigation steps that exceeded their deadline.",
+        "# TYPE clockbot_step_timeouts_total counter",
+        "clockbot_step_timeouts_total {:d}".format(snapshot["step_timeouts"]),
+        "# HELP clockbot_navigations_per_minute Navigations per minute over the rolling window.",
+        "# TYPE clockbot_navigations_per_minute gauge",
+        "clockbot_navigations_per_minute {:.3f}".format(snapshot["navigations_per_minute"]),
+        "# HELP clockbot_load_time_seconds Load time per page and browser over the rolling window.",
+        "# TYPE clockbot_load_time_seconds summary"
+    ]
+    for page in snapshot["pages"]:
+        labels = "browser={},item={}".format(prometheus_label(page["browser"]), prometheus_label(page["item"]))
+        for q, value in page["quantiles"].items():
+            lines.append("clockbot_load_time_seconds{{{},quantile=\"{}\"}} {}".format(labels, q, value))
+        lines.append("clockbot_load_time_seconds_sum{{{}}} {}".format(labels, page["sum"]))
+        lines.append("clockbot_load_time_seconds_count{{{}}} {:d}".format(labels, page["count"]))
+    return "\n".join(lines) + "\n"
+
+class MetricsLogMiner(analyzer.ClockbotLogMiner):
+    """
+    Log miner that passes the navigations of every completed run, the starting and closing of browsers, and step
+    timeouts to a Metrics instance
+    """
+    def __init__(self, metrics):
+        super().__init__(None)
+        self.metrics = metrics
+        self.session_mode = "fresh"
+        self.config = ""
+        self.columns = [ self.timedata_columns.index(column) for column in ["browser", "item", "laadtijd", "gecensureerd"] ]
+
+    def write_rows(self, rows):
+        browser, item, load_time, censored = self.columns
+        self.metrics.add_run([ (row[browser], row[item], float(row[load_time].replace(",", ".")), row[censored]) for row in rows ])
+
+    def start_session(self, t, browser_name):
+        self.set_browser_name(t, browser_name)
+        self.metrics.session_started()
+
+    def end_session(self, t, s):
+        self.metrics.session_ended()
+
+    def alert(self, t, s):
+        self.metrics.alert_raised()
+
+    def step_timeout(self, t, s):
+        self.set_timeout(t, s)
+        self.metrics.step_timed_out()
+
+    actions = {
+        **analyzer.ClockbotLogMiner.actions,
+        "Starting browser": start_session,
+        "Browser closed": end_session,
+        "Alert": alert,
+        "Step timeout": step_timeout
+    }
+
+def follow_log(filename, metrics, offset = 0, interval = 1.0):
+    """
+    Starts a background thread that follows a log file that is being written by another process, e.g. a worker, and
+    passes its lines to a MetricsLogMiner. Waits for the file to be created; stops when the log ends with "End"
+
+    offset (integer): position in the file at which to start, e.g. the end of the part written by an earlier campaign
+    """
+    def follow():
+        while not os.path.exists(filename):
+            sleep(interval)
+        miner = MetricsLogMiner(metrics)
+        with open(filename, "r", encoding = "utf-8") as f_in:
+            f_in.seek(offset)
+            miner.process_all(miner.follow_lines(f_in, interval))
+
+    threading.Thread(target = follow, daemon = True).start()
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = prometheus_text(self.server.metrics.snapshot())
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path == "/metrics.json":
+            body = json.dumps(self.server.metrics.snapshot())
+            content_type = "application/json"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_metrics_server(metrics, port = 9100):
+    """
+    Starts an HTTP server for the given metrics in a background thread, on localhost
+
+    port (integer): port to listen on. 0 picks a free port
+
+    Returns: the server. Its port is server.server_address[1]
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsRequestHandler)
+    server.daemon_threads = True
+    server.metrics = metrics
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server
@@ -0,0 +1,98 @@
+import csv
+
+import analyzer
+
+def write_log(path, messages):
+    """
+    Writes a clockbot log in the text format, with one message every 0.5 s
+    """
+    with open(path, "w", encoding = "utf-8") as f_out:
+        for i, message in enumerate(messages):
+            f_out.write("2026-10-18 13:00:00.000 {:.6f} {}\n".format(1000 + 0.5 * i, message))
+
+def read_rows(path):
+    with open(path, "r", newline = "", encoding = "utf-8") as f_in:
+        return list(csv.DictReader(f_in, dialect = "nl_excel"))
+
+def reuse_run(run_nr):
+    return [
+        f"Run number: {run_nr}",
+        "Resetting session",
+        "Session reset complete",
+        "Filling in username: u1",
+        "Pressing login button",
+        "Login complete",
+        "Active item: P1",
+        "Navigating to next menu item",
+        "Navigation complete",
+        "Active item: P2",
+        "Run complete"
+    ]
+
+def test_reuse_log_keeps_resumed_run_numbers(tmp_path):
+    # The log of a campaign in reuse mode that was resumed after run 2: the runs keep the numbers that were logged,
+    # although "Resetting session" follows every "Run number"
+    log_path = tmp_path / "reuse.log"
+    write_log(log_path, [
+        "Clockbot start",
+        "Configuration: local",
+        "Traversal method: linear",
+        "Session mode: reuse",
+        "Starting browser: chrome"
+    ] + reuse_run(3) + reuse_run(4) + [ "Closing browser", "End" ])
+
+    out_path = tmp_path / "reuse_timedata.csv"
+    clm = analyzer.ClockbotLogMiner(str(out_path))
+    clm.process_file(str(log_path))
+    clm.f_out.close()
+
+    rows = read_rows(out_path)
+    assert [ (row["run_nr"], row["item"]) for row in rows ] == [
+        (str(run_nr), item) for run_nr in [3, 4] for item in ["P1", "P2"] ]
+
+def index_campaign():
+    """
+    Returns the messages of a campaign with the index traversal method, in which the second run exceeds the deadline
+    of the step to menu item 2
+    """
+    messages = [ "Clockbot start", "Configuration: local", "Traversal method: index", "Session mode: fresh" ]
+    for run_nr in [1, 2]:
+        messages += [ f"Run number: {run_nr}", "Starting browser: chrome", "Filling in username: u1", "Pressing login button",
+                      "Login complete", "Active item: P1" ]
+        for i in [1, 2]:
+            messages.append(f"Navigating to menu item {i}")
+            if run_nr == 2 and i == 2:
+                messages += [ 'Step timeout: 0.500 s: {"target": 2}', "Recycling browser session", "Closing browser", "Browser closed" ]
+                break
+            messages += [ "Navigation complete", f"Active item: P{i + 1}", "Navigating to first menu item", "Navigation complete", "Active item: P1" ]
+        else:
+            messages += [ "Closing browser", "Browser closed" ]
+    return messages + [ "End" ]
+
+def test_ingest_attributes_censored_row_across_checkpoint(tmp_path):
+    # The log is ingested in two parts, split between the step timeout and the end of its run. The censored load time
+    # is attributed to the page of the target menu item, as when the whole log is mined at once
+    messages = index_campaign()
+    split = next(i for i, message in enumerate(messages) if message.startswith("Step timeout")) + 1
+    log_path = tmp_path / "index.log"
+    write_log(log_path, messages)
+    with open(log_path, "r", encoding = "utf-8") as f_in:
+        lines = f_in.readlines()
+
+    out_path = tmp_path / "index_timedata.csv"
+    clm = analyzer.ClockbotLogMiner(str(out_path))
+    clm.process_file(str(log_path))
+    clm.f_out.close()
+    mined = [ row["item"] for row in read_rows(out_path) if row["gecensureerd"] == "1" ]
+    assert mined == ["P3"]
+
+    db = analyzer.open_results_db(str(tmp_path / "results.db"))
+    with open(log_path, "w", encoding = "utf-8") as f_out:
+        f_out.writelines(lines[:split])
+    analyzer.ClockbotLogIngester(db).ingest_file(str(log_path))
+    with open(log_path, "a", encoding = "utf-8") as f_out:
+        f_out.writelines(lines[split:])
+    analyzer.ClockbotLogIngester(db).ingest_file(str(log_path))
+    ingested = [ row[0] for row in db.execute("SELECT item FROM navigations WHERE gecensureerd = 1") ]
+    db.close()
+    assert ingested == mined
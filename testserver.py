@@ -0,0 +1,224 @@
+#
+# Clockbot test server
+#
+# (c) 2018 Centraal Bureau voor de Statistiek / Statistics Netherlands
+#
+# This program is a local stand-in for the questionnaire server. It mimics the parts of the DOM of a Blaise
+# questionnaire that clockbot depends on (see config-local.py): the login form, the #ag content container, the
+# #ak menu, the next page button and the splash screen. Pages are loaded with a configurable, deterministic delay,
+# so that the time clockbot measures can be compared with the time the server actually took
+#
+import argparse
+import json
+import threading
+from html import escape
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from http.cookies import SimpleCookie
+from urllib.parse import urlparse, parse_qs
+from time import sleep
+
+login_page = """<!DOCTYPE html>
+<html>
+<head><title>Inloggen</title></head>
+<body>
+<form method="post" action="/login">
+<input id="Username" name="Username" type="text">
+<input id="Password" name="Password" type="password">
+<input type="submit" value="Inloggen">
+</form>
+</body>
+</html>
+"""
+
+# The questionnaire page. The page contents are loaded by JavaScript, with the splash screen shown while loading,
+# just like a Blaise 5 questionnaire. The page that is shown after logging in is the last page the user visited
+questionnaire_page = """<!DOCTYPE html>
+<html>
+<head>
+<title>Vragenlijst</title>
+<style>
+.splash { display: none; position: fixed; top: 0; left: 0; width: 100%; height: 100%; background: white; }
+.splash.splash-active { display: block; }
+.display-none { display: none; }
+#e { height: 300px; overflow: auto; }
+</style>
+</head>
+<body>
+<div id="ak">
+{menu}
+</div>
+<div id="e">
+<div id="ag"></div>
+<div style="height: 1000px"></div>
+</div>
+<button id="as" type="button">Volgende</button>
+<div class="splash splash-active"></div>
+<script>
+var n_pages = {n_pages};
+var current = {current};
+var menu = document.querySelectorAll("#ak a");
+var splash = document.querySelector(".splash");
+
+function load(nr) {
+    splash.classList.add("splash-active");
+    fetch("/page?nr=" + nr, { credentials: "same-origin" })
+        .then(function(response) { return response.json(); })
+        .then(function(page) {
+            for (var i = 0; i < menu.length; i++) {
+                menu[i].className = i === page.nr ? "enabled Font28" : "enabled";
+            }
+            document.getElementById("ag").innerHTML = page.content;
+            document.getElementById("as").className = page.nr === n_pages - 1 ? "display-none" : "";
+            current = page.nr;
+            splash.classList.remove("splash-active");
+        });
+}
+
+for (var i = 0; i < menu.length; i++) {
+    menu[i].addEventListener("click", (function(nr) {
+        return function(event) { event.preventDefault(); load(nr); };
+    })(i));
+}
+document.getElementById("as").addEventListener("click", function() { load(current + 1); });
+load(current);
+</script>
+</body>
+</html>
+"""
+
+def page_title(nr):
+    """
+    Returns the title of page nr (zero-based), as shown in the menu, and as logged by clockbot as active item
+    """
+    return "Pagina {:d}".format(nr + 1)
+
+class QuestionnaireServer(ThreadingHTTPServer):
+    """
+    HTTP server with a questionnaire of n_pages pages. Loading page nr takes page_delay(nr) seconds, logging in
+    takes login_delay seconds. The server remembers the last page visited for each user
+    """
+    daemon_threads = True
+
+    def __init__(self, address, n_pages = 10, delay = 0.2, delay_step = 0.0, page_delays = None, login_delay = 0.0):
+        super().__init__(address, QuestionnaireRequestHandler)
+        self.n_pages = n_pages
+        self.delay = delay
+        self.delay_step = delay_step
+        self.page_delays = page_delays
+        self.login_delay = login_delay
+        self.last_page = {}
+
+    def page_delay(self, nr):
+        """
+        Returns the time it takes to load page nr (zero-based), in seconds
+        """
+        if self.page_delays:
+            return self.page_delays[nr % len(self.page_delays)]
+        return self.delay + nr * self.delay_step
+
+class QuestionnaireRequestHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def username(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        return cookie["session"].value if "session" in cookie else None
+
+    def send(self, body, content_type = "text/html; charset=utf-8", status = 200, headers = {}):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        username = self.username()
+
+        if url.path == "/":
+            if username is None:
+                self.send(login_page)
+            else:
+                self.send("", status = 303, headers = { "Location": "/questionnaire" })
+
+        elif url.path == "/questionnaire" and username is not None:
+            menu = "\n".join('<a class="enabled" href="#">{}</a>'.format(page_title(nr)) for nr in range(self.server.n_pages))
+            page = questionnaire_page.replace("{menu}", menu)
+            page = page.replace("{n_pages}", str(self.server.n_pages))
+            page = page.replace("{current}", str(self.server.last_page.get(username, 0)))
+            self.send(page)
+
+        elif url.path == "/page" and username is not None:
+            nr = int(parse_qs(url.query).get("nr", ["0"])[0])
+            nr = max(0, min(nr, self.server.n_pages - 1))
+            sleep(self.server.page_delay(nr))
+            self.server.last_page[username] = nr
+            content = "<h1>{}</h1><p>Vraag {:d} van {:d}</p>".format(escape(page_title(nr)), nr + 1, self.server.n_pages)
+            self.send(json.dumps({ "nr": nr, "content": content }), "application/json")
+
+        else:
+            self.send("", status = 303, headers = { "Location": "/" })
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == "/login":
+            length = int(self.headers.get("Content-Length", 0))
+            form = parse_qs(self.rfile.read(length).decode("utf-8"))
+            username = form.get("Username", [""])[0]
+            sleep(self.server.login_delay)
+            self.send("", status = 303, headers = {
+                "Location": "/questionnaire",
+                "Set-Cookie": "session={}; Path=/".format(username)
+            })
+        else:
+            self.send("", status = 404)
+
+def start_server(port = 8000, **settings):
+    """
+    Starts a questionnaire server in a background thread
+
+    port (integer): port to listen on, on localhost. 0 picks a free port
+    settings: passed to QuestionnaireServer
+
+    Returns: the server. Its port is server.server_address[1]; stop it with server.shutdown()
+    """
+    server = QuestionnaireServer(("127.0.0.1", port), **settings)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server
+
+def add_server_arguments(parser):
+    """
+    Adds the command line arguments for the page delays of the server to the given argument parser
+    """
+    parser.add_argument("--pages", dest = "n_pages", type = int, default = 10, help = "Number of pages of the questionnaire. Default: %(default)i.")
+    parser.add_argument("--delay", dest = "delay", type = float, default = 0.2, help = "Time to load the first page, in seconds. Default: %(default)s.")
+    parser.add_argument("--delay-step", dest = "delay_step", type = float, default = 0.0, help = "Additional loading time of each next page, in seconds. Default: %(default)s.")
+    parser.add_argument("--page-delays", dest = "page_delays", type = lambda s: [ float(x) for x in s.split(",") ], default = None, help = "Comma-separated loading times of the pages, in seconds. Overrides --delay and --delay-step.")
+    parser.add_argument("--login-delay", dest = "login_delay", type = float, default = 0.0, help = "Time to process a login, in seconds. Default: %(default)s.")
+
+def server_settings(args):
+    return {
+        "n_pages": args.n_pages,
+        "delay": args.delay,
+        "delay_step": args.delay_step,
+        "page_delays": args.page_delays,
+        "login_delay": args.login_delay
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Local stand-in for the questionnaire server, for testing and benchmarking clockbot")
+    parser.add_argument("-p", dest = "port", type = int, default = 8000, help = "Port to listen on. Default: %(default)i.")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = QuestionnaireServer(("127.0.0.1", args.port), **server_settings(args))
+    print("Serving questionnaire on http://127.0.0.1:{:d}/".format(args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,185 @@
+#
+# Clockbot throttling proxy
+#
+# (c) 2018 Centraal Bureau voor de Statistiek / Statistics Netherlands
+#
+# This program is an HTTP proxy that emulates a slow network link, such as the home DSL or mobile connection of a
+# respondent: it adds latency, and limits the download and upload bandwidth. Chrome and Edge emulate network
+# conditions themselves; for the other browsers, clockbot starts a throttling proxy for every browser it starts
+# (clockbot --network-profile). It can also be run by itself, e.g. to try out a questionnaire on a slow link.
+#
+# Both plain HTTP requests and HTTPS tunnels (CONNECT) are supported. Plain HTTP connections carry a single request,
+# so that every request is forwarded to the right server
+#
+import argparse
+import asyncio
+import threading
+from time import monotonic
+from urllib.parse import urlsplit
+
+# Network profiles that can be emulated: round-trip latency in ms, and download and upload bandwidth in kbit/s.
+# The profiles are those of common network throttling presets
+network_profiles = {
+    "cable": { "latency_ms": 28, "download_kbps": 5000, "upload_kbps": 1000 },
+    "dsl": { "latency_ms": 50, "download_kbps": 1500, "upload_kbps": 384 },
+    "4g": { "latency_ms": 170, "download_kbps": 9000, "upload_kbps": 9000 },
+    "3g": { "latency_ms": 300, "download_kbps": 1600, "upload_kbps": 768 },
+    "3g-slow": { "latency_ms": 400, "download_kbps": 400, "upload_kbps": 400 }
+}
+
+class Link:
+    """
+    One direction of an emulated network link, shared by all connections through the proxy. Data is sent one chunk
+    after the other at the given bandwidth, and arrives after the one-way latency
+
+    latency (float): one-way latency, in seconds
+    bandwidth (float): bandwidth in kbit/s, or None for no limit
+    """
+    def __init__(self, latency, bandwidth = None):
+        self.latency = latency
+        self.bytes_per_s = None if not bandwidth else bandwidth * 1000 / 8
+        self.free = 0.0
+
+    def arrival(self, n_bytes):
+        """
+        Returns: the monotonic time at which n_bytes of data, sent now, arrive at the other end
+        """
+        sent = monotonic()
+        if self.bytes_per_s is not None:
+            self.free = max(self.free, sent) + n_bytes / self.bytes_per_s
+            sent = self.free
+        return sent + self.latency
+
+async def pipe(reader, writer, link, first = b""):
+    """
+    Copies data from reader to writer over the given link, until the reader reaches the end of its stream. Data is
+    read as soon as it is available, and written when it arrives, so the link holds the data in transit
+
+    first (bytes): data that was read from the reader before, to be sent ahead of the rest
+    """
+    in_transit = asyncio.Queue()
+
+    async def deliver():
+        while True:
+            arrival, data = await in_transit.get()
+            delay = arrival - monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if data is None:
+                break
+            writer.write(data)
+            await writer.drain()
+        if writer.can_write_eof():
+            writer.write_eof()
+
+    delivery = asyncio.ensure_future(deliver())
+    if first:
+        in_transit.put_nowait((link.arrival(len(first)), first))
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            in_transit.put_nowait((link.arrival(len(data)), data))
+    finally:
+        in_transit.put_nowait((link.arrival(0), None))
+        await delivery
+
+class ThrottlingProxy:
+    """
+    HTTP proxy on localhost that sends all traffic over an emulated network link with the given round-trip latency
+    (ms) and download and upload bandwidth (kbit/s). Setting up a connection to a server takes one round trip.
+    Start it with start(), which runs the proxy in a background thread
+    """
+    def __init__(self, latency_ms = 0, download_kbps = None, upload_kbps = None):
+        self.latency = latency_ms / 1000
+        self.upstream = Link(self.latency / 2, upload_kbps)
+        self.downstream = Link(self.latency / 2, download_kbps)
+        self.loop = None
+        self.server = None
+        self.port = None
+
+    async def handle(self, reader, writer):
+        server_writer = None
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            request_line, _, header_lines = head.decode("latin-1").partition("\r\n")
+            method, target, version = request_line.split(" ", 2)
+
+            if method == "CONNECT":
+                host, _, port = target.rpartition(":")
+                await asyncio.sleep(self.latency)
+                server_reader, server_writer = await asyncio.open_connection(host.strip("[]"), int(port))
+                writer.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+                first = b""
+            else:
+                url = urlsplit(target)
+                await asyncio.sleep(self.latency)
+                server_reader, server_writer = await asyncio.open_connection(url.hostname, url.port or 80)
+                path = (url.path or "/") + ("?" + url.query if url.query else "")
+                headers = [ line for line in header_lines.split("\r\n") if line and
+                            line.split(":", 1)[0].strip().lower() not in ("connection", "proxy-connection", "keep-alive") ]
+                first = "\r\n".join([ f"{method} {path} {version}" ] + headers + [ "Connection: close", "", "" ]).encode("latin-1")
+
+            await asyncio.gather(pipe(reader, server_writer, self.upstream, first),
+                                 pipe(server_reader, writer, self.downstream))
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except asyncio.CancelledError:
+            # The proxy is shut down; see close()
+            pass
+        finally:
+            writer.close()
+            if server_writer is not None:
+                server_writer.close()
+
+    def start(self, port = 0):
+        """
+        Starts the proxy in a background thread
+
+        port (integer): port to listen on, on localhost. 0 picks a free port; the port used is self.port
+
+        Returns: self
+        """
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(asyncio.start_server(self.handle, "127.0.0.1", port))
+        self.port = self.server.sockets[0].getsockname()[1]
+
+        def serve():
+            self.loop.run_forever()
+            self.loop.close()
+
+        threading.Thread(target = serve, daemon = True).start()
+        return self
+
+    async def close(self):
+        self.server.close()
+        connections = [ task for task in asyncio.all_tasks() if task is not asyncio.current_task() ]
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions = True)
+
+    def shutdown(self):
+        """
+        Stops the proxy. Connections that are still open are dropped
+        """
+        asyncio.run_coroutine_threadsafe(self.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "HTTP proxy that emulates a slow network link")
+    parser.add_argument("-p", dest = "port", type = int, default = 8080, help = "Port to listen on. Default: %(default)i.")
+    parser.add_argument("--profile", dest = "profile", choices = list(network_profiles.keys()), default = None, help = "Network profile to emulate.")
+    parser.add_argument("--latency", dest = "latency_ms", type = float, default = 0, help = "Round-trip latency, in ms. Overridden by --profile. Default: %(default)s.")
+    parser.add_argument("--download", dest = "download_kbps", type = float, default = None, help = "Download bandwidth, in kbit/s. Overridden by --profile. Default: no limit.")
+    parser.add_argument("--upload", dest = "upload_kbps", type = float, default = None, help = "Upload bandwidth, in kbit/s. Overridden by --profile. Default: no limit.")
+    args = parser.parse_args()
+
+    settings = network_profiles[args.profile] if args.profile is not None else {
+        "latency_ms": args.latency_ms, "download_kbps": args.download_kbps, "upload_kbps": args.upload_kbps }
+    proxy = ThrottlingProxy(**settings).start(args.port)
+    print("Throttling proxy on 127.0.0.1:{:d}, {}".format(proxy.port, ", ".join(f"{name} {value}" for name, value in settings.items())))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        proxy.shutdown()